@@ -0,0 +1,114 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from psycopg2 import sql
+from data_retrieval import OPL_NUMERIC_COLUMNS
+from postgres_ingestion import PowerliftingDataHandler
+
+
+def synthetic_rows(rows: int, seed: int = 1) -> pd.DataFrame:
+
+    """
+    Build a numeric-heavy frame shaped like the filtered OpenPowerlifting data, with about 10% missing numbers.
+
+    Parameters:
+    - rows (int): The number of rows.
+    - seed (int): The random seed, so runs are repeatable.
+
+    Returns:
+    - pd.DataFrame: The rows, with the dtypes the retriever parses the csv into.
+    """
+
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'Name': [f"Lifter {i}" for i in rng.integers(0, rows // 4 + 1, rows)],
+        'Sex': pd.Categorical(rng.choice(['M', 'F'], rows)),
+        'Event': pd.Categorical(rng.choice(['SBD', 'B'], rows)),
+        'Equipment': pd.Categorical(rng.choice(['Raw', 'Wraps', 'Single-ply'], rows)),
+        'AgeClass': rng.choice(['24-34', '35-39', '40-44'], rows).astype(object),
+        'Division': rng.choice(['Open', 'Juniors', 'Masters 1'], rows).astype(object),
+        'WeightClassKg': rng.choice(['83', '93', '105', '120+'], rows).astype(object),
+        'Place': rng.integers(1, 10, rows).astype(str).astype(object),
+        'Tested': pd.Categorical(rng.choice(['Yes', None], rows)),
+        'Country': pd.Categorical(['USA'] * rows),
+        'Federation': pd.Categorical(rng.choice(['USAPL', 'USPA', 'RPS'], rows)),
+        'Date': pd.to_datetime('2018-01-01') + pd.to_timedelta(rng.integers(0, 2500, rows), unit='D'),
+        'MeetState': pd.Categorical(rng.choice(['TX', 'CA', 'NY'], rows)),
+        'MeetName': [f"Meet {i}" for i in rng.integers(0, 2000, rows)],
+    })
+    for col in OPL_NUMERIC_COLUMNS:
+        values = np.round(rng.uniform(20, 400, rows), 2)
+        values[rng.random(rows) < 0.1] = np.nan
+        frame[col] = values
+    return frame
+
+
+def benchmark_copy_formats(database_url: str, rows: int, repeats: int = 3,
+                           table_name: str = 'copy_format_benchmark') -> list:
+
+    """
+    Time insert_data with CSV and binary COPY into a scratch table, with and without quarantine.
+
+    The scratch table is created from the declared schema before every timed load, so each load goes into an empty
+    table, and it is dropped at the end along with the loads it recorded.
+
+    Parameters:
+    - database_url (str): The URL of the PostgreSQL database, e.g. a local stand-in.
+    - rows (int): The number of rows per load.
+    - repeats (int): The number of timed loads per case; the best one is reported.
+    - table_name (str): The scratch table's name.
+
+    Returns:
+    - list of tuple: (copy format, quarantine, best seconds, rows per second) per case.
+    """
+
+    frame = synthetic_rows(rows)
+    postgres_instance = PowerliftingDataHandler(database_url)
+    drop_query = sql.SQL("DROP TABLE IF EXISTS {}, {} CASCADE;").format(
+        sql.Identifier(table_name), sql.Identifier(f"{table_name}_rejects"))
+
+    def reset_table():
+        with postgres_instance.connection() as conn, conn.cursor() as cur:
+            cur.execute(drop_query)
+            postgres_instance.create_enum_types(cur)
+            cur.execute(postgres_instance.build_create_table_query(frame, table_name))
+            conn.commit()
+
+    results = []
+    try:
+        for copy_format in ('csv', 'binary'):
+            for quarantine in (False, True):
+                timings = []
+                for _ in range(repeats):
+                    reset_table()
+                    start = time.perf_counter()
+                    postgres_instance.insert_data(frame, table_name, copy_format=copy_format, quarantine=quarantine)
+                    timings.append(time.perf_counter() - start)
+                results.append((copy_format, quarantine, min(timings), rows / min(timings)))
+    finally:
+        with postgres_instance.connection() as conn, conn.cursor() as cur:
+            cur.execute(drop_query)
+            for metadata_table in ('etl_runs', 'dataset_state'):
+                cur.execute(sql.SQL('DELETE FROM {} WHERE "TableName" = %s;').format(sql.Identifier(metadata_table)),
+                            (table_name,))
+            conn.commit()
+        postgres_instance.close()
+
+    baseline = results[0][3]
+    print(f"{'format':>7} {'quarantine':>11} {'seconds':>9} {'rows/s':>11} {'speedup':>8}")
+    for copy_format, quarantine, seconds, rows_per_second in results:
+        print(f"{copy_format:>7} {str(quarantine):>11} {seconds:>9.2f} {rows_per_second:>11,.0f} "
+              f"{rows_per_second / baseline:>7.2f}x")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark insert_data's CSV and binary COPY formats.")
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'))
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    benchmark_copy_formats(args.database_url, args.rows, args.repeats)
@@ -0,0 +1,52 @@
+import argparse
+import os
+import time
+from postgres_ingestion import PowerliftingDataHandler
+
+
+def benchmark_fetch_data(database_url: str, table_name: str, worker_counts: list, repeats: int = 3) -> list:
+
+    """
+    Time fetch_data against a PostgreSQL database at different worker counts.
+
+    Each worker count gets a fresh handler, and so a fresh connection pool, plus one untimed warm-up fetch so the
+    connections are open and the table is in the server's cache before the timed runs.
+
+    Parameters:
+    - database_url (str): The URL of the PostgreSQL database, e.g. a local stand-in loaded with powerlifting_data.
+    - table_name (str): The name of the table.
+    - worker_counts (list of int): The worker counts to compare.
+    - repeats (int): The number of timed fetches per worker count; the best one is reported.
+
+    Returns:
+    - list of tuple: (workers, rows, best seconds) per worker count.
+    """
+
+    results = []
+    for workers in worker_counts:
+        postgres_instance = PowerliftingDataHandler(database_url, max_connections=max(workers, 1))
+        rows = len(postgres_instance.fetch_data(table_name, workers=workers))
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            postgres_instance.fetch_data(table_name, workers=workers)
+            timings.append(time.perf_counter() - start)
+        postgres_instance.close()
+        results.append((workers, rows, min(timings)))
+
+    baseline = results[0][2]
+    print(f"{'workers':>8} {'rows':>10} {'seconds':>9} {'speedup':>8}")
+    for workers, rows, seconds in results:
+        print(f"{workers:>8} {rows:>10} {seconds:>9.2f} {baseline / seconds:>7.2f}x")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark fetch_data across worker counts.")
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'))
+    parser.add_argument('--table', default='powerlifting_data')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 7])
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    benchmark_fetch_data(args.database_url, args.table, args.workers, args.repeats)
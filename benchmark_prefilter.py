@@ -0,0 +1,109 @@
+import argparse
+import random
+import tempfile
+import time
+import zipfile
+import pandas as pd
+from data_retrieval import PowerliftingDataRetriever
+
+SYNTHETIC_HEADER = ('Name,Sex,Event,Equipment,Age,AgeClass,BirthYearClass,Division,BodyweightKg,WeightClassKg,'
+                    'Best3SquatKg,Best3BenchKg,Best3DeadliftKg,TotalKg,Place,Dots,Wilks,Tested,Country,State,'
+                    'Federation,Date,MeetCountry,MeetState,MeetTown,MeetName,Sanctioned')
+
+
+def write_synthetic_archive(path: str, rows: int, usa_share: float = 0.2, seed: int = 1) -> None:
+
+    """
+    Write a zip archive shaped like the OpenPowerlifting bulk csv, with a known share of USA lifters.
+
+    Meet countries are drawn independently of lifter countries, so MeetCountry=USA rows from other countries test
+    that the pre-filter matches the Country field only, and every 50th meet name is quoted and contains a comma.
+
+    Parameters:
+    - path (str): Where to write the archive.
+    - rows (int): The number of lifter rows.
+    - usa_share (float): The share of rows whose Country is USA.
+    - seed (int): The random seed, so runs are repeatable.
+    """
+
+    rng = random.Random(seed)
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open('openpowerlifting-latest/openpowerlifting.csv', 'w') as csv_file:
+            csv_file.write((SYNTHETIC_HEADER + '\n').encode())
+            lines = []
+            for i in range(rows):
+                country = 'USA' if rng.random() < usa_share else rng.choice(['Canada', 'Norway', 'Russia', 'Australia'])
+                meet_country = rng.choice(['USA', 'Canada', 'Norway'])
+                meet_name = f'"Open, Meet {i % 1000}"' if i % 50 == 0 else f"Meet {i % 1000}"
+                squat, bench, deadlift = rng.randint(60, 400), rng.randint(40, 300), rng.randint(80, 420)
+                lines.append(f"Lifter {rng.randint(0, rows // 4)},{rng.choice('MF')},SBD,Raw,{rng.randint(14, 70)}.5,"
+                             f"24-34,24-39,Open,{rng.randint(44, 160)}.25,93,{squat}.5,{bench},{deadlift},"
+                             f"{squat + bench + deadlift}.5,{rng.randint(1, 9)},{rng.randint(200, 600)}.12,"
+                             f"{rng.randint(200, 600)}.34,Yes,{country},TX,USAPL,"
+                             f"{rng.randint(1990, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d},"
+                             f"{meet_country},TX,Austin,{meet_name},Yes")
+                if len(lines) == 100000:
+                    csv_file.write(('\n'.join(lines) + '\n').encode())
+                    lines = []
+            if lines:
+                csv_file.write(('\n'.join(lines) + '\n').encode())
+
+
+def benchmark_prefilter(rows: int, filter_date: str, repeats: int = 3, spool_dir: str = None) -> list:
+
+    """
+    Time the subset and full extracts of a synthetic archive with and without the byte-level USA pre-filter.
+
+    The retriever reads the synthetic archive from its spool file instead of downloading one, and the outputs with
+    and without the pre-filter are checked to be identical.
+
+    Parameters:
+    - rows (int): The number of rows in the synthetic archive.
+    - filter_date (str): The watermark for the subset extract, as passed to process_subset_from_csv.
+    - repeats (int): The number of timed runs per case; the best one is reported.
+    - spool_dir (str): Where to write the archive, a temporary directory by default.
+
+    Returns:
+    - list of tuple: (extract, prefilter, rows out, best seconds) per case.
+    """
+
+    retriever = PowerliftingDataRetriever(spool_dir=spool_dir or tempfile.mkdtemp())
+    print(f"Writing a synthetic archive with {rows:,} rows to {retriever.archive_path}")
+    write_synthetic_archive(retriever.archive_path, rows)
+    retriever.download_archive = lambda: retriever.archive_path
+
+    extracts = {
+        'subset': lambda prefilter: retriever.process_subset_from_csv(filter_date, print_interval=10**9,
+                                                                      prefilter=prefilter, downcast=False),
+        'full': lambda prefilter: retriever.retrieve_and_process_csv(print_interval=10**9, prefilter=prefilter,
+                                                                     downcast=False),
+    }
+
+    results = []
+    for extract, run in extracts.items():
+        outputs = {}
+        for prefilter in (False, True):
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                outputs[prefilter] = run(prefilter)
+                timings.append(time.perf_counter() - start)
+            results.append((extract, prefilter, len(outputs[prefilter]), min(timings)))
+        pd.testing.assert_frame_equal(outputs[False].astype(object), outputs[True].astype(object))
+
+    print(f"{'extract':>8} {'prefilter':>10} {'rows out':>10} {'seconds':>9} {'speedup':>8}")
+    for extract, prefilter, rows_out, seconds in results:
+        baseline = next(best for name, flag, _, best in results if name == extract and not flag)
+        print(f"{extract:>8} {str(prefilter):>10} {rows_out:>10} {seconds:>9.2f} {baseline / seconds:>7.2f}x")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the byte-level USA pre-filter on a synthetic archive.")
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--filter-date', default='2020-01-01')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--spool-dir')
+    args = parser.parse_args()
+
+    benchmark_prefilter(args.rows, args.filter_date, args.repeats, args.spool_dir)
@@ -2,7 +2,7 @@ import pandas as pd
 #from postgres_ingestion import PowerliftingDataHandler
 import psycopg2
 from psycopg2 import sql
-from data_retrieval import PowerliftingDataRetriever
+from data_retrieval import OPL_DTYPES, PowerliftingDataRetriever
 from sklearn.cluster import DBSCAN
 from sklearn.preprocessing import StandardScaler
 import numpy as np
@@ -11,6 +11,13 @@ import numpy as np
 
 #df = retrieve_and_process_csv()
 
+# The data is stored in kilograms only; pounds are derived on demand with this factor
+LBS_PER_KG = 2.2
+
+# Text columns the app filters on, held as categoricals so comparisons run on integer codes
+APP_CATEGORICAL_COLUMNS = ['Name', 'MeetName', 'Federation', 'MeetState', 'AgeClass', 'WeightClassKg', 'Division',
+                           'Tested', 'Sex', 'Event']
+
 def remove_special_chars(df):
     if df is not None:
         df['WeightClassKg'] = df['WeightClassKg'].str.replace(r'\+', '', regex=True)
@@ -18,6 +25,13 @@ def remove_special_chars(df):
         print('Dataframe is empty')
 
 
+def to_kg(weight, lbs):
+    '''normalise a user-entered weight to kilograms, leaving a missing weight missing'''
+    if weight is None or not lbs:
+        return weight
+    return weight / LBS_PER_KG
+
+
 def convert_kg_to_lbs(df):
     kg = 'Kg'
     lb = 'Lb'
@@ -28,7 +42,7 @@ def convert_kg_to_lbs(df):
             else:
                 try:
                     modified_col_name = name.replace(kg,lb)
-                    df[modified_col_name] = df[name]*2.2
+                    df[modified_col_name] = df[name]*LBS_PER_KG
                 except ValueError as e:
                     pass
 
@@ -126,43 +140,131 @@ def clean_same_names(df):
     filtered_df['identifier'] = filtered_df['new_lifter_flag'].apply(lambda x: 'New Lifter' if x else 'Current Lifter')
 
     # Create a new column that concatenates Name with persona
-    filtered_df['name_with_persona'] = filtered_df['Name'] + ' #' + filtered_df['persona'].astype(str)
+    filtered_df['name_with_persona'] = filtered_df['Name'].astype(str) + ' #' + filtered_df['persona'].astype(str)
 
     return filtered_df
 
 
-def reduce_mem_usage(df, verbose=True):
-    numerics = ['int16', 'int32', 'int64', 'float16', 'float32', 'float64']
-    start_mem = df.memory_usage(deep=True).sum() / 1024**2
+# Largest round-trip error accepted when downcasting a float column, by column name suffix; other float columns must
+# round-trip exactly
+DOWNCAST_TOLERANCES = {'Kg': 0.01, 'Lb': 0.01, 'Wilks': 0.01}
+
+# float16 is left out: numpy has no float16 arithmetic, so sums and means of it round at every step
+FLOAT_CANDIDATES = [np.float32, np.float64]
+INT_CANDIDATES = [pd.Int8Dtype(), pd.Int16Dtype(), pd.Int32Dtype(), pd.Int64Dtype()]
+
+# Text columns with fewer distinct values than this share of their rows become categoricals
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+def downcast_tolerance(col, tolerances=None):
+    '''look up the round-trip tolerance for a column, by exact name first and then by suffix'''
+    tolerances = DOWNCAST_TOLERANCES if tolerances is None else tolerances
+    if col in tolerances:
+        return tolerances[col]
+    return next((tolerance for suffix, tolerance in tolerances.items() if col.endswith(suffix)), 0)
+
+
+def smallest_int_dtype(values):
+    '''pick the smallest nullable integer type that holds every value of a whole-number series'''
+    c_min, c_max = values.min(), values.max()
+    for dtype in INT_CANDIDATES:
+        info = np.iinfo(dtype.numpy_dtype)
+        if pd.isna(c_min) or (info.min <= c_min and c_max <= info.max):
+            return dtype
+    return None
+
+
+def downcast_column(values, tolerance=0):
+    '''return the column in the smallest dtype that keeps every value within tolerance, or as it is'''
+    if isinstance(values.dtype, pd.CategoricalDtype) or pd.api.types.is_datetime64_any_dtype(values):
+        return values
+
+    if pd.api.types.is_float_dtype(values) or pd.api.types.is_integer_dtype(values):
+        present = values.dropna().to_numpy(dtype=np.float64)
+        # Whole-number columns without a tolerance, e.g. ages or places, become nullable integers so missing values
+        # stay missing; measured weights stay floating point even when a subset of them happens to be whole, and so
+        # do columns with no values at all, e.g. Dots or Goodlift before a federation reports them
+        if tolerance == 0 and present.size and np.array_equal(present, np.round(present)):
+            dtype = smallest_int_dtype(values)
+            if dtype is not None:
+                return values.astype(dtype)
+        for dtype in FLOAT_CANDIDATES:
+            if np.dtype(dtype).itemsize >= values.dtype.itemsize:
+                break
+            error = np.abs(present.astype(dtype).astype(np.float64) - present)
+            if error.size == 0 or error.max() <= tolerance:
+                return values.astype(dtype)
+        return values
+
+    if values.dtype == object:
+        # Columns the extract declares as text or category, e.g. WeightClassKg's '120+', keep their declared type;
+        # only undeclared columns have theirs inferred
+        if OPL_DTYPES.get(values.name) in ('object', 'category'):
+            return values
+        # Work on the distinct values, which are far fewer than the rows
+        distinct = pd.Series(values.dropna().unique(), dtype=object)
+        numbers = pd.to_numeric(distinct, errors='coerce')
+        # Numeric text converts only if every value reads back exactly
+        if len(distinct) and numbers.notna().all() and np.array_equal(numbers, np.round(numbers)):
+            dtype = smallest_int_dtype(numbers)
+            if dtype is not None and (numbers.astype(dtype).astype(str) == distinct.astype(str)).all():
+                return values.map(dict(zip(distinct, numbers))).astype(dtype)
+        if len(distinct) < CATEGORY_MAX_UNIQUE_RATIO * len(values):
+            return values.astype('category')
+    return values
+
+
+def memory_report(dtypes_before, bytes_before, after):
+    '''compare a DataFrame's columns with the dtypes and bytes recorded before they were converted'''
+    report = pd.DataFrame({'dtype_before': dtypes_before.astype(str), 'dtype_after': after.dtypes.astype(str),
+                           'bytes_before': bytes_before,
+                           'bytes_after': after.memory_usage(deep=True, index=False)})
+    report['saved'] = report['bytes_before'] - report['bytes_after']
+    return report
+
+
+def reduce_mem_usage(df, verbose=True, tolerances=None):
+    '''downcast every column to the smallest dtype that keeps its values within the column's tolerance'''
+    # Record the dtypes and sizes rather than copying the frame, which would double the peak memory
+    if verbose:
+        dtypes_before, bytes_before = df.dtypes, df.memory_usage(deep=True, index=False)
     for col in df.columns:
-        col_type = df[col].dtypes
-        if col_type in numerics:
-            c_min = df[col].min()
-            c_max = df[col].max()
-            if str(col_type)[:3] == 'int':  # for integers
-                if c_min > np.iinfo(np.int8).min and c_max < np.iinfo(np.int8).max:
-                    df[col] = df[col].astype(np.int8)
-                elif c_min > np.iinfo(np.int16).min and c_max < np.iinfo(np.int16).max:
-                    df[col] = df[col].astype(np.int16)
-                elif c_min > np.iinfo(np.int32).min and c_max < np.iinfo(np.int32).max:
-                    df[col] = df[col].astype(np.int32)
-                elif c_min > np.iinfo(np.int64).min and c_max < np.iinfo(np.int64).max:
-                    df[col] = df[col].astype(np.int64)
-            else:  # for floats.
-                if c_min > np.finfo(np.float16).min and c_max < np.finfo(np.float16).max:
-                    df[col] = df[col].astype(np.float16)
-                elif c_min > np.finfo(np.float32).min and c_max < np.finfo(np.float32).max:
-                    df[col] = df[col].astype(np.float32)
-                else:
-                    df[col] = df[col].astype(np.float64)
-    end_mem = df.memory_usage(deep=True).sum() / 1024**2
-    if verbose: print('Mem. usage decreased to {:5.2f} Mb ({:.1f}% reduction)'.format(end_mem, 100 * (start_mem - end_mem) / start_mem))
+        df[col] = downcast_column(df[col], downcast_tolerance(col, tolerances))
+
+    if verbose:
+        report = memory_report(dtypes_before, bytes_before, df)
+        print(report[report['saved'] != 0].to_string())
+        start_mem, end_mem = report['bytes_before'].sum() / 1024**2, report['bytes_after'].sum() / 1024**2
+        print('Mem. usage decreased from {:5.2f} Mb to {:5.2f} Mb ({:.1f}% reduction)'.format(
+            start_mem, end_mem, 100 * (start_mem - end_mem) / start_mem))
     return df
 
+def encode_app_dtypes(df, verbose=False):
+    '''Compact the app's DataFrame: filter columns to categoricals, Date to datetime64 and the rest downcast'''
+    for col in APP_CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date'])
+    return reduce_mem_usage(df, verbose=verbose)
+
+def display_view(rows):
+    '''Prepare the rows about to be shown: float32 columns widened back to the precision they were kept at, and
+    *Lb columns derived from the *Kg ones for just these rows'''
+    rows = rows.copy()
+    for col in rows.columns:
+        if rows[col].dtype == np.float32:
+            tolerance = downcast_tolerance(col)
+            rows[col] = rows[col].astype(np.float64)
+            if tolerance > 0:
+                rows[col] = rows[col].round(int(round(-np.log10(tolerance))))
+    return convert_kg_to_lbs(rows)
+
 def calculate_wilks(gender: str, bodyweight: float, total: float, lbs: bool) -> float:
-    if lbs:
-        bodyweight = bodyweight / 2.2
-        total = total / 2.2
+    bodyweight = to_kg(bodyweight, lbs)
+    total = to_kg(total, lbs)
 
     coefficients = {
         'm': [-216.0475144, 16.2606339, -0.002388645, -0.00113732, 7.01863e-6, -1.291e-8],
@@ -2,63 +2,465 @@ import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 import zipfile
-from io import BytesIO
+import csv
+import hashlib
+import json
+import os
+import tempfile
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pandas.api.types import union_categoricals
+
+'''Declared ingest schema for the OpenPowerlifting bulk csv'''
+OPL_NUMERIC_COLUMNS = [
+    'Age', 'BodyweightKg',
+    'Squat1Kg', 'Squat2Kg', 'Squat3Kg', 'Squat4Kg', 'Best3SquatKg',
+    'Bench1Kg', 'Bench2Kg', 'Bench3Kg', 'Bench4Kg', 'Best3BenchKg',
+    'Deadlift1Kg', 'Deadlift2Kg', 'Deadlift3Kg', 'Deadlift4Kg', 'Best3DeadliftKg',
+    'TotalKg', 'Dots', 'Wilks', 'Glossbrenner', 'Goodlift',
+]
+OPL_CATEGORY_COLUMNS = [
+    'Sex', 'Event', 'Equipment', 'Tested', 'Country', 'State',
+    'Federation', 'ParentFederation', 'MeetCountry', 'MeetState', 'Sanctioned',
+]
+OPL_TEXT_COLUMNS = [
+    'Name', 'AgeClass', 'BirthYearClass', 'Division', 'WeightClassKg', 'Place', 'MeetTown', 'MeetName',
+]
+OPL_DATE_COLUMNS = ['Date']
+
+OPL_DTYPES = {
+    **{col: 'float64' for col in OPL_NUMERIC_COLUMNS},
+    **{col: 'category' for col in OPL_CATEGORY_COLUMNS},
+    **{col: 'object' for col in OPL_TEXT_COLUMNS},
+}
+
+'''Columns the app reads back out of Postgres (see PowerliftingDataHandler.fetch_data)'''
+APP_COLUMNS = [
+    'Name', 'Sex', 'Event', 'Age', 'BirthYearClass', 'AgeClass', 'Division', 'BodyweightKg', 'WeightClassKg',
+    'Best3SquatKg', 'Best3BenchKg', 'Best3DeadliftKg', 'Wilks', 'Place', 'Tested', 'Country', 'Federation',
+    'Date', 'MeetName', 'MeetState', 'MeetCountry',
+]
+
+
+def csv_read_options(columns=None):
+    '''Build pd.read_csv keyword arguments for the declared schema, projecting to columns when given'''
+    options = {'dtype': OPL_DTYPES, 'parse_dates': OPL_DATE_COLUMNS}
+    if columns is not None:
+        # Country and Date are always needed for the USA / watermark filters
+        wanted = set(columns) | {'Country', 'Date'}
+        options['usecols'] = lambda col: col in wanted
+    return options
+
+
+def concat_chunks(chunks):
+    '''Concatenate filtered chunks, unifying category columns so they stay categorical'''
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame()
+    # empty frames can carry different dtypes (e.g. an unparsed Date), keep one only if nothing else is left
+    chunks = [chunk for chunk in chunks if not chunk.empty] or chunks[:1]
+    category_columns = [col for col in chunks[0].columns if isinstance(chunks[0][col].dtype, pd.CategoricalDtype)]
+    if category_columns and len(chunks) > 1:
+        dtypes = {col: pd.CategoricalDtype(union_categoricals([chunk[col] for chunk in chunks],
+                                                              sort_categories=True).categories)
+                  for col in category_columns}
+        chunks = [chunk.astype(dtypes) for chunk in chunks]
+    return pd.concat(chunks, ignore_index=True)
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    '''Hash a file on disk block by block'''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def filter_chunk(chunk, filter_dt=None):
+    '''Keep USA lifters, and only meets after filter_dt when a watermark is given'''
+    filtered_chunk = chunk[chunk['Country'] == 'USA']
+    if filter_dt is not None:
+        filtered_chunk = filtered_chunk[filtered_chunk['Date'] > filter_dt]
+    return filtered_chunk
+
+
+def clean_chunk(chunk):
+    '''Apply the app's cleaning steps to a filtered chunk'''
+    # imported here because data_cleaning imports this module
+    from data_cleaning import remove_special_chars, apply_business_rules
+
+    # Weights stay in kilograms only; pounds are derived when they are displayed
+    chunk = chunk.copy()
+    remove_special_chars(chunk)
+    return apply_business_rules(chunk)
+
+
+def parse_csv_block(header, block, columns=None, filter_dt=None, clean=False, prefilter=False):
+    '''Parse, filter and optionally clean one newline-aligned block of the csv, run inside a worker process'''
+    csv_stream = BytesIO(header + block)
+    if prefilter:
+        csv_stream = LinePrefilter(csv_stream, country='USA', since=filter_dt)
+    chunk = pd.read_csv(csv_stream, **csv_read_options(columns))
+    filtered_chunk = filter_chunk(chunk, filter_dt)
+    return chunk.shape[0], clean_chunk(filtered_chunk) if clean else filtered_chunk
+
+
+'''Wrap a zip member stream and track how many decompressed bytes the CSV parser has consumed'''
+class ProgressReader:
+
+    def __init__(self, stream, total_bytes):
+        self.stream = stream
+        self.total_bytes = total_bytes
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def readline(self):
+        line = self.stream.readline()
+        self.bytes_read += len(line)
+        return line
+
+    def readable(self):
+        return True
+
+    def close(self):
+        self.stream.close()
+
+    @property
+    def closed(self):
+        return self.stream.closed
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    @property
+    def fraction_read(self):
+        return min(self.bytes_read / self.total_bytes, 1.0) if self.total_bytes else 0.0
+
+
+'''Scan raw csv bytes and pass on only the header plus lines that could match the USA / watermark filters'''
+class LinePrefilter:
+
+    def __init__(self, stream, country='USA', since=None, block_size=4 * 1024**2):
+        self.stream = stream
+        self.block_size = block_size
+        self.country_token = country.encode()
+        self.since = since
+        self.country_index = None
+        self.date_index = None
+        self.buffer = b''
+        self.offset = 0
+        self.remainder = b''
+        self.header_sent = False
+        self.exhausted = False
+        self.lines_scanned = 0
+        self.lines_kept = 0
+
+    def read_header(self, header):
+        '''Locate the Country (and Date) fields so e.g. MeetCountry=USA can't make a row a candidate'''
+        columns = next(csv.reader([header.decode('utf-8-sig').strip()]))
+        self.country_index = columns.index('Country') if 'Country' in columns else None
+        self.date_index = columns.index('Date') if self.since is not None and 'Date' in columns else None
+        if self.date_index is not None:
+            self.years = {str(year).encode() for year in range(self.since.year, pd.Timestamp.now().year + 2)}
+
+    def fill(self):
+        block = self.stream.read(self.block_size)
+        if block:
+            lines = (self.remainder + block).split(b'\n')
+            self.remainder = lines.pop()
+        else:
+            self.exhausted = True
+            lines = [self.remainder] if self.remainder else []
+            self.remainder = b''
+
+        header = b''
+        if lines and not self.header_sent:
+            header = lines.pop(0) + b'\n'
+            self.read_header(header)
+            self.header_sent = True
+
+        self.lines_scanned += len(lines)
+        if self.country_index is not None:
+            # cheap substring test first, then check the token really sits in the Country (and Date) field.
+            # Lines with quoted fields can't be split on commas reliably, so they are always kept
+            token = b',' + self.country_token + b','
+            splits = max(self.country_index, self.date_index or 0) + 1
+            lines = [line for line in lines if token in line and
+                     (b'"' in line or line.split(b',', splits)[self.country_index:self.country_index + 1] == [self.country_token])]
+            if self.date_index is not None:
+                lines = [line for line in lines if
+                         b'"' in line or b''.join(line.split(b',', splits)[self.date_index:self.date_index + 1])[:4] in self.years]
+        self.lines_kept += len(lines)
+
+        self.buffer = self.buffer[self.offset:] + header + (b'\n'.join(lines) + b'\n' if lines else b'')
+        self.offset = 0
+
+    def read(self, size=-1):
+        while not self.exhausted and (size < 0 or len(self.buffer) - self.offset < size):
+            self.fill()
+        end = len(self.buffer) if size < 0 else self.offset + size
+        data = self.buffer[self.offset:end]
+        self.offset += len(data)
+        return data
+
+    def readable(self):
+        return True
+
+    def close(self):
+        self.stream.close()
+
+    @property
+    def closed(self):
+        return self.stream.closed
+
+    def readline(self):
+        while not self.exhausted and self.buffer.find(b'\n', self.offset) == -1:
+            self.fill()
+        end = self.buffer.find(b'\n', self.offset)
+        return self.read(len(self.buffer) - self.offset if end == -1 else end + 1 - self.offset)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
 
 '''Create PL Data retriever class'''
 class PowerliftingDataRetriever:
 
     '''initialize variable states'''
-    def __init__(self):
+    def __init__(self, spool_dir=None):
         self.updated_dt_url = 'https://openpowerlifting.gitlab.io/opl-csv/bulk-csv.html'
         self.zip_url = 'https://openpowerlifting.gitlab.io/opl-csv/files/openpowerlifting-latest.zip'
         self.csv_data = None
         self.updated_date = None
+        self.spool_dir = spool_dir or tempfile.gettempdir()
+        self.archive_path = os.path.join(self.spool_dir, 'openpowerlifting-latest.zip')
+        self.fetch_cache_path = os.path.join(self.spool_dir, 'openpowerlifting-fetch-cache.json')
+        self.fetch_cache = self.load_fetch_cache()
+        self.archive_sha256 = None
+
+    '''create function to read the ETag / Last-Modified / content hash cache kept next to the spool file'''
+    def load_fetch_cache(self):
+        try:
+            with open(self.fetch_cache_path) as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+
+    def save_fetch_cache(self):
+        with open(self.fetch_cache_path, 'w') as cache_file:
+            json.dump(self.fetch_cache, cache_file, indent=2)
+
+    '''create function to build If-None-Match / If-Modified-Since headers from the cache entry for a url'''
+    def conditional_headers(self, url):
+        cached = self.fetch_cache.get(url, {})
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+
+    '''create functions to remember which upstream version a partial spool file belongs to, for If-Range'''
+    def resume_headers(self, url, downloaded):
+        partial = self.fetch_cache.get(url, {}).get('partial', {})
+        # If-Range needs a strong ETag; a weak one can't vouch for byte ranges, so fall back to Last-Modified
+        validator = partial.get('etag') if partial.get('etag') and not partial['etag'].startswith('W/') \
+            else partial.get('last_modified')
+        if not validator:
+            return None
+        return {'Range': f'bytes={downloaded}-', 'If-Range': validator}
+
+    def remember_partial(self, url, response_headers):
+        self.fetch_cache.setdefault(url, {})['partial'] = {'etag': response_headers.get('ETag'),
+                                                           'last_modified': response_headers.get('Last-Modified')}
+        self.save_fetch_cache()
+
+    def forget_partial(self, url):
+        if self.fetch_cache.get(url, {}).pop('partial', None) is not None:
+            self.save_fetch_cache()
+
+    def remember_fetch(self, url, response_headers, **values):
+        cached = self.fetch_cache.setdefault(url, {})
+        cached['etag'] = response_headers.get('ETag')
+        cached['last_modified'] = response_headers.get('Last-Modified')
+        cached.update(values)
+        self.save_fetch_cache()
+
+    '''create function to stream the zip archive to a local spool file, resuming partial downloads with HTTP Range'''
+    def download_archive(self, block_size=1024 * 1024, max_retries=5, backoff=2, timeout=60):
+        part_path = self.archive_path + '.part'
+
+        for attempt in range(1, max_retries + 1):
+            downloaded = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            resume = self.resume_headers(self.zip_url, downloaded) if downloaded else None
+            if downloaded and resume is None:
+                # nothing records which version of the archive the spool file holds, so it can't be resumed safely
+                os.remove(part_path)
+                downloaded = 0
+            if resume:
+                # If-Range: the server sends the rest if upstream is unchanged, or the whole new archive with a 200
+                headers = resume
+            elif os.path.exists(self.archive_path):
+                # only ask for the body if upstream changed since the archive we already have
+                headers = self.conditional_headers(self.zip_url)
+            else:
+                headers = {}
+
+            try:
+                with requests.get(self.zip_url, headers=headers, stream=True, timeout=timeout) as response:
+                    if response.status_code == 304:
+                        self.archive_sha256 = (self.fetch_cache[self.zip_url].get('sha256')
+                                               or file_sha256(self.archive_path))
+                        return self.archive_path
+                    elif response.status_code == 416 and downloaded:
+                        # the spool file already holds the whole archive (If-Range matched, or we'd have had a 200)
+                        os.replace(part_path, self.archive_path)
+                        self.archive_sha256 = file_sha256(self.archive_path)
+                        self.remember_fetch(self.zip_url, response.headers, sha256=self.archive_sha256)
+                        self.forget_partial(self.zip_url)
+                        return self.archive_path
+                    elif response.status_code == 206:
+                        content_range = response.headers.get('Content-Range', '')
+                        range_start, _, range_size = content_range.partition(' ')[2].partition('/')
+                        if range_start.partition('-')[0] != str(downloaded):
+                            # the server sent a different range than the one asked for, so the spool file can't be
+                            # extended with it. Start over
+                            print(f'Resumed download returned range {content_range!r}, expected a start of '
+                                  f'{downloaded}. Restarting the download.')
+                            os.remove(part_path)
+                            self.forget_partial(self.zip_url)
+                            continue
+                        mode = 'ab'
+                        expected_size = int(range_size) if range_size.isdigit() else 0
+                    elif response.status_code == 200:
+                        # server ignored the Range header or upstream changed since the spool file was started
+                        # (If-Range didn't match), start the spool file over
+                        mode = 'wb'
+                        expected_size = int(response.headers.get('Content-Length', 0))
+                        self.remember_partial(self.zip_url, response.headers)
+                    else:
+                        print(f'Failed to retrieve the zip file. Status code: {response.status_code}')
+                        return None
+
+                    with open(part_path, mode) as spool_file:
+                        for block in response.iter_content(chunk_size=block_size):
+                            if block:
+                                spool_file.write(block)
+
+                if expected_size and os.path.getsize(part_path) < expected_size:
+                    raise requests.exceptions.ChunkedEncodingError('Download ended before the full archive was received')
+
+                os.replace(part_path, self.archive_path)
+                self.archive_sha256 = file_sha256(self.archive_path)
+                self.remember_fetch(self.zip_url, response.headers, sha256=self.archive_sha256)
+                self.forget_partial(self.zip_url)
+                return self.archive_path
+
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                if attempt == max_retries:
+                    break
+                wait = backoff ** attempt
+                print(f'Download interrupted ({e}). Retrying in {wait}s (attempt {attempt} of {max_retries})...')
+                time.sleep(wait)
+
+        return None
 
     '''create function to retrieve csv from website and read as a df'''
-    def retrieve_and_process_csv(self, chunk_size = 10000, print_interval=250000):
-        response = requests.get(self.zip_url)
+    def retrieve_and_process_csv(self, chunk_size = 10000, print_interval=25, columns=None, prefilter=False,
+                                 workers=1, clean=False, downcast=True):
+        archive_path = self.download_archive()
 
-        if response.status_code == 200:
-            with zipfile.ZipFile(BytesIO(response.content), 'r') as zipf:
+        if archive_path:
+            with zipfile.ZipFile(archive_path, 'r') as zipf:
                 csv_file = self.find_csv_file(zipf)
 
                 if csv_file:
-                    chunks = pd.read_csv(zipf.open(csv_file), chunksize=chunk_size)
-                    filtered_chunks = []
-                    records_ingested = 0
-                    #filter_date = pd.to_datetime(filter_date)
-
-                    for chunk in chunks:
-
-                        #test
-                        #chunk['Date'] = pd.to_datetime(chunk['Date'])
-                        # Apply filtering directly during reading
-                        filtered_chunk = chunk[chunk['Country'] == 'USA']
-                        #filtered_chunk = filtered_chunk[filtered_chunk['Date'] >= filter_date]
-                        filtered_chunks.append(filtered_chunk)
-
-                        records_ingested += chunk.shape[0]
-
-                        # Print records ingested at regular intervals
-                        if records_ingested % print_interval == 0:
-                            print(f"Records Ingested: {records_ingested}")
+                    filtered_chunks = list(self.iter_csv_chunks(zipf, csv_file, None, chunk_size, print_interval,
+                                                                columns=columns, prefilter=prefilter, workers=workers,
+                                                                clean=clean))
 
                     # Concatenate filtered chunks into a single DataFrame
-                    self.csv_data = pd.concat(filtered_chunks, ignore_index=True)
+                    self.csv_data = concat_chunks(filtered_chunks)
+                    if downcast:
+                        # imported here because data_cleaning imports this module
+                        from data_cleaning import reduce_mem_usage
+                        self.csv_data = reduce_mem_usage(self.csv_data, verbose=False)
                     return self.csv_data  # Return the DataFrame
                 else:
                     print('No CSV file found in the zip archive')
         else:
             print('Failed to retrieve the zip file.')
 
+    '''create function to parse the csv chunk by chunk in this process'''
+    def parse_serially(self, csv_stream, chunk_size, columns=None, filter_dt=None, clean=False, prefilter=False):
+        if prefilter:
+            # Drop lines that cannot pass the USA / watermark filters before pandas parses them,
+            # the exact filters still run on every chunk
+            csv_stream = LinePrefilter(csv_stream, country='USA', since=filter_dt)
+
+        for chunk in pd.read_csv(csv_stream, chunksize=chunk_size, **csv_read_options(columns)):
+            filtered_chunk = filter_chunk(chunk, filter_dt)
+            yield chunk.shape[0], clean_chunk(filtered_chunk) if clean else filtered_chunk
+
+    '''create function to parse newline-aligned blocks of the csv across a process pool, yielding in source order'''
+    def parse_in_parallel(self, csv_stream, workers, block_size=32 * 1024**2, **parse_options):
+        header = csv_stream.readline()
+        pending = deque()
+        remainder = b''
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                block = csv_stream.read(block_size)
+                data = remainder + block
+                if block:
+                    cut = data.rfind(b'\n') + 1
+                    data, remainder = data[:cut], data[cut:]
+                if data:
+                    pending.append(executor.submit(parse_csv_block, header, data, **parse_options))
+
+                # Keep at most two blocks per worker in flight so memory stays bounded
+                while pending and (len(pending) >= 2 * workers or not block):
+                    yield pending.popleft().result()
+
+                if not block:
+                    break
 
     '''create function to extract the date of the last refresh of this data'''
     def retrieve_last_updated_date(self):
         url = self.updated_dt_url
-        response = requests.get(url)
+        cached = self.fetch_cache.get(url, {})
+        response = requests.get(url, headers=self.conditional_headers(url) if cached.get('updated_date') else {})
+
+        if response.status_code == 304:
+            self.updated_date = cached['updated_date']
+            return self.updated_date
 
         if response.status_code == 200:
+            page_sha256 = hashlib.sha256(response.content).hexdigest()
+            if cached.get('updated_date') and cached.get('sha256') == page_sha256:
+                self.updated_date = cached['updated_date']
+                return self.updated_date
+
             soup = BeautifulSoup(response.text, 'html.parser')
             div_element = soup.find('div', {'class': 'content'})
 
@@ -76,6 +478,7 @@ class PowerliftingDataRetriever:
                     else:
                         self.updated_date = '(Could not find an updated date..)'
 
+                    self.remember_fetch(url, response.headers, sha256=page_sha256, updated_date=self.updated_date)
                     return self.updated_date
                 else:
                     print('Unable to find any unordered lists in the div')
@@ -84,50 +487,89 @@ class PowerliftingDataRetriever:
         else:
             print('Failed to access the data')
 
-    def process_subset_from_csv(self, filter_date, chunk_size=10000, print_interval=250):
-        response = requests.get(self.zip_url)
+    def process_subset_from_csv(self, filter_date, chunk_size=10000, print_interval=250, columns=None,
+                                prefilter=False, workers=1, clean=False, downcast=True):
+        archive_path = self.download_archive()
 
-        if response.status_code == 200:
-            with zipfile.ZipFile(BytesIO(response.content), 'r') as zipf:
+        if archive_path:
+            with zipfile.ZipFile(archive_path, 'r') as zipf:
                 csv_file = self.find_csv_file(zipf)
 
                 if csv_file:
-                    chunks = pd.read_csv(zipf.open(csv_file), chunksize=chunk_size)
-                    filtered_chunks = []
-                    total_records_ingested = 0  # Track total records ingested across all chunks
-                    filter_dt = pd.to_datetime(filter_date)
-
-                    # Count total number of chunks
-                    total_records = sum(1 for line in zipf.open(csv_file))
-                    quotient, remainder = divmod(total_records, chunk_size)
-                    total_chunks = quotient + (remainder > 0)
-
-                    for chunk_number, chunk in enumerate(chunks, start=1):
-                        chunk['Date'] = pd.to_datetime(chunk['Date'])
-
-                        # Apply filtering directly during reading
-                        filtered_chunk = chunk[chunk['Country'] == 'USA']
-                        filtered_chunk = filtered_chunk[filtered_chunk['Date'] > filter_dt]
-                        filtered_chunks.append(filtered_chunk)
-
-                        records_ingested = filtered_chunk.shape[0]
-                        total_records_ingested += records_ingested
-
-                        # Print records ingested for the current chunk
-                        print(f"Processing Chunk {chunk_number} of {total_chunks}")
-
-                        # Print total records ingested at regular intervals
-                        if chunk_number % print_interval == 0 or chunk_number == total_chunks:
-                            print(f"New Records Available: {total_records_ingested}")
+                    filtered_chunks = list(self.iter_csv_chunks(zipf, csv_file, filter_date, chunk_size, print_interval,
+                                                                columns=columns, prefilter=prefilter, workers=workers,
+                                                                clean=clean))
 
                     # Concatenate filtered chunks into a single DataFrame
-                    self.csv_data = pd.concat(filtered_chunks, ignore_index=True)
+                    self.csv_data = concat_chunks(filtered_chunks)
+                    if downcast and not self.csv_data.empty:
+                        # imported here because data_cleaning imports this module
+                        from data_cleaning import reduce_mem_usage
+                        self.csv_data = reduce_mem_usage(self.csv_data, verbose=False)
                     return self.csv_data  # Return the DataFrame
                 else:
                     print('No CSV file found in the zip archive')
         else:
             print('Failed to retrieve the zip file.')
 
+    '''create function to yield filtered chunks newer than filter_date one at a time, e.g. to feed a load pipeline'''
+    def stream_subset_from_csv(self, filter_date, chunk_size=10000, print_interval=250, **parse_options):
+        archive_path = self.download_archive()
+        if not archive_path:
+            raise RuntimeError('Failed to retrieve the zip file.')
+
+        with zipfile.ZipFile(archive_path, 'r') as zipf:
+            csv_file = self.find_csv_file(zipf)
+            if not csv_file:
+                raise RuntimeError('No CSV file found in the zip archive')
+
+            yield from self.iter_csv_chunks(zipf, csv_file, filter_date, chunk_size, print_interval, **parse_options)
+
+    '''create function to parse the csv member in a single decompression pass, reporting progress as it goes; a
+    filter_date of None keeps every meet date'''
+    def iter_csv_chunks(self, zipf, csv_file, filter_date, chunk_size, print_interval, columns=None, prefilter=False,
+                        workers=1, clean=False):
+        # Estimate progress from the bytes decompressed so far instead of pre-counting lines,
+        # so the member is only inflated once
+        csv_info = zipf.getinfo(csv_file)
+        print(f"Extracting {csv_file} ({csv_info.compress_size / 1024**2:.1f} MB compressed, "
+              f"{csv_info.file_size / 1024**2:.1f} MB uncompressed)")
+        csv_stream = ProgressReader(zipf.open(csv_file), csv_info.file_size)
+        filter_dt = pd.to_datetime(filter_date)
+        parse_options = {'columns': columns, 'filter_dt': filter_dt, 'clean': clean, 'prefilter': prefilter}
+        if workers > 1:
+            parsed_chunks = self.parse_in_parallel(csv_stream, workers, **parse_options)
+        else:
+            parsed_chunks = self.parse_serially(csv_stream, chunk_size, **parse_options)
+        total_records_ingested = 0  # Track total records ingested across all chunks
+        rows_processed = 0
+        chunk_number = 0
+        start_time = time.time()
+
+        for chunk_number, (rows_parsed, filtered_chunk) in enumerate(parsed_chunks, start=1):
+            yield filtered_chunk
+
+            records_ingested = filtered_chunk.shape[0]
+            total_records_ingested += records_ingested
+            rows_processed += rows_parsed
+
+            # Print progress at regular intervals
+            if chunk_number % print_interval == 0:
+                self.print_progress(chunk_number, rows_processed, total_records_ingested,
+                                    csv_stream.fraction_read, start_time)
+
+        csv_stream.close()
+        if chunk_number % print_interval != 0:
+            self.print_progress(chunk_number, rows_processed, total_records_ingested, 1.0, start_time)
+
+    '''create function to report chunks, rows, throughput and an ETA for a single-pass extract'''
+    def print_progress(self, chunk_number, rows_processed, records_ingested, fraction_read, start_time):
+        elapsed = max(time.time() - start_time, 1e-9)
+        rows_per_second = rows_processed / elapsed
+        eta = elapsed * (1 - fraction_read) / fraction_read if fraction_read else float('nan')
+        print(f"Processed Chunk {chunk_number} ({fraction_read:.1%}): {rows_processed} rows at "
+              f"{rows_per_second:,.0f} rows/s, ETA {eta:.0f}s. New Records Available: {records_ingested}")
+
     '''create a function to absract the process of collecting the csv'''
     def find_csv_file(self, zipf):
         for file_name in zipf.namelist():
@@ -0,0 +1,146 @@
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_FORMAT = 3
+
+# Snapshots kept on disk, including the current one, so a worker still mapping the previous one keeps working
+SNAPSHOT_VERSIONS_KEPT = 2
+
+CURRENT_POINTER = 'CURRENT'
+MANIFEST_NAME = 'manifest.json'
+
+
+def write_snapshot(df, snapshot_dir, source_version=None):
+
+    """
+    Write a cleaned DataFrame as a versioned columnar snapshot the app can memory-map at startup.
+
+    Each column is saved as its own .npy file: numeric and datetime columns as they are, nullable integer columns
+    as their values plus a missing-value mask, categorical and text columns as integer codes plus a fixed-width
+    array of their distinct values. The snapshot goes into a new version directory and the CURRENT pointer is
+    switched to it with an atomic rename, so a reader never sees a half-written snapshot.
+
+    Parameters:
+    - df (pd.DataFrame): The data, as returned by fetch_data.
+    - snapshot_dir (str): The directory holding the snapshot versions.
+    - source_version (str): Identifies the database state the data came from, used to detect a stale snapshot.
+
+    Returns:
+    - str: The path of the new version directory.
+    """
+
+    created_at = datetime.now(timezone.utc)
+    version = created_at.strftime('%Y%m%dT%H%M%S%fZ')
+    version_dir = os.path.join(snapshot_dir, version)
+    os.makedirs(version_dir)
+
+    columns = []
+    for position, col in enumerate(df.columns):
+        file_stem = f"{position:03d}"
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(version_dir, f"{file_stem}.codes.npy"), values.cat.codes.to_numpy())
+            np.save(os.path.join(version_dir, f"{file_stem}.categories.npy"),
+                    np.asarray(values.cat.categories, dtype=str))
+            columns.append({'name': col, 'kind': 'category', 'file': f"{file_stem}.codes.npy",
+                            'categories': f"{file_stem}.categories.npy"})
+        elif isinstance(values.array, pd.arrays.IntegerArray):
+            np.save(os.path.join(version_dir, f"{file_stem}.npy"),
+                    values.to_numpy(dtype=values.dtype.numpy_dtype, na_value=0))
+            np.save(os.path.join(version_dir, f"{file_stem}.mask.npy"), values.isna().to_numpy())
+            columns.append({'name': col, 'kind': 'nullable', 'file': f"{file_stem}.npy",
+                            'mask': f"{file_stem}.mask.npy"})
+        elif values.dtype.kind in 'biufM':
+            np.save(os.path.join(version_dir, f"{file_stem}.npy"), values.to_numpy())
+            columns.append({'name': col, 'kind': 'values', 'file': f"{file_stem}.npy"})
+        else:
+            codes, categories = pd.factorize(values.astype(object))
+            code_dtype = np.int16 if len(categories) < np.iinfo(np.int16).max else np.int32
+            np.save(os.path.join(version_dir, f"{file_stem}.codes.npy"), codes.astype(code_dtype))
+            np.save(os.path.join(version_dir, f"{file_stem}.categories.npy"), np.asarray(categories, dtype=str))
+            columns.append({'name': col, 'kind': 'text', 'file': f"{file_stem}.codes.npy",
+                            'categories': f"{file_stem}.categories.npy"})
+
+    manifest = {'format': SNAPSHOT_FORMAT, 'created_at': created_at.isoformat(), 'source_version': source_version,
+                'rows': len(df), 'columns': columns}
+    with open(os.path.join(version_dir, MANIFEST_NAME), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+    pointer_path = os.path.join(snapshot_dir, CURRENT_POINTER)
+    with open(pointer_path + '.tmp', 'w') as pointer_file:
+        pointer_file.write(version)
+    os.replace(pointer_path + '.tmp', pointer_path)
+
+    prune_snapshots(snapshot_dir)
+    return version_dir
+
+
+def prune_snapshots(snapshot_dir, keep=SNAPSHOT_VERSIONS_KEPT):
+    '''remove all but the newest keep snapshot versions'''
+    versions = sorted(entry for entry in os.listdir(snapshot_dir)
+                      if os.path.isfile(os.path.join(snapshot_dir, entry, MANIFEST_NAME)))
+    for version in versions[:-keep]:
+        shutil.rmtree(os.path.join(snapshot_dir, version), ignore_errors=True)
+
+
+def read_snapshot_manifest(snapshot_dir):
+
+    """
+    Read the manifest of the current snapshot.
+
+    Parameters:
+    - snapshot_dir (str): The directory holding the snapshot versions.
+
+    Returns:
+    - dict or None: The manifest, with its version directory under 'path', or None if there is no usable snapshot.
+    """
+
+    try:
+        with open(os.path.join(snapshot_dir, CURRENT_POINTER)) as pointer_file:
+            version_dir = os.path.join(snapshot_dir, pointer_file.read().strip())
+        with open(os.path.join(version_dir, MANIFEST_NAME)) as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get('format') != SNAPSHOT_FORMAT:
+        return None
+    manifest['path'] = version_dir
+    return manifest
+
+
+def load_snapshot(manifest):
+
+    """
+    Load a snapshot into a DataFrame, memory-mapping its numeric and datetime columns and the codes of its
+    categorical columns.
+
+    The mapped columns are copy-on-write: pages are read from the file as they are touched and shared with other
+    processes mapping the same snapshot, and a process that modifies them gets its own copy.
+
+    Parameters:
+    - manifest (dict): The snapshot's manifest, from read_snapshot_manifest.
+
+    Returns:
+    - pd.DataFrame: The snapshot's data.
+    """
+
+    data = {}
+    for column in manifest['columns']:
+        values = np.load(os.path.join(manifest['path'], column['file']), mmap_mode='c')
+        if column['kind'] in ('category', 'text'):
+            categories = np.load(os.path.join(manifest['path'], column['categories'])).astype(object)
+            values = pd.Categorical.from_codes(values, categories)
+            if column['kind'] == 'text':
+                values = values.astype(object)
+        elif column['kind'] == 'nullable':
+            mask = np.load(os.path.join(manifest['path'], column['mask']), mmap_mode='c')
+            values = pd.arrays.IntegerArray(values, mask)
+        data[column['name']] = values
+
+    # copy=False keeps the mapped arrays instead of consolidating them into new blocks
+    return pd.DataFrame(data, copy=False)
@@ -0,0 +1,161 @@
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# smaps_rollup fields, in kB
+SHARED_FIELDS = ('Shared_Clean', 'Shared_Dirty')
+UNIQUE_FIELDS = ('Private_Clean', 'Private_Dirty')
+
+
+def read_smaps_rollup(pid: int) -> dict:
+
+    """
+    Read a process's memory totals from /proc (Linux only).
+
+    Parameters:
+    - pid (int): The process id.
+
+    Returns:
+    - dict: smaps_rollup field name to size in kB.
+    """
+
+    totals = {}
+    with open(f"/proc/{pid}/smaps_rollup") as smaps:
+        for line in smaps:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                totals[parts[0].rstrip(':')] = int(parts[1])
+    return totals
+
+
+def process_memory(pid: int) -> dict:
+
+    """
+    Summarise a process's memory in MB.
+
+    Unique memory (USS) is what the process alone holds and what would be freed if it exited. Shared memory is
+    mapped by other processes too, e.g. pages a worker inherited from a preloading master and hasn't written to.
+    PSS splits each shared page evenly between the processes mapping it, so it adds up across processes.
+
+    Parameters:
+    - pid (int): The process id.
+
+    Returns:
+    - dict: 'rss', 'pss', 'shared' and 'unique', in MB.
+    """
+
+    totals = read_smaps_rollup(pid)
+    return {'rss': totals['Rss'] / 1024, 'pss': totals['Pss'] / 1024,
+            'shared': sum(totals.get(field, 0) for field in SHARED_FIELDS) / 1024,
+            'unique': sum(totals.get(field, 0) for field in UNIQUE_FIELDS) / 1024}
+
+
+def child_pids(pid: int) -> list:
+    '''list the direct children of a process, i.e. the workers of a gunicorn master'''
+    with open(f"/proc/{pid}/task/{pid}/children") as children:
+        return [int(child) for child in children.read().split()]
+
+
+def wait_until_settled(master_pid: int, deadline: float, interval: float = 2) -> None:
+    '''wait until the workers' combined RSS stops growing, i.e. every worker has finished loading the app'''
+    previous = None
+    while time.time() < deadline:
+        current = sum(read_smaps_rollup(pid)['Rss'] for pid in child_pids(master_pid))
+        if previous is not None and current - previous < 1024:
+            return
+        previous = current
+        time.sleep(interval)
+
+
+def report_memory(master_pid: int) -> dict:
+
+    """
+    Print per-worker unique and shared memory for a running gunicorn master and its workers.
+
+    Parameters:
+    - master_pid (int): The gunicorn master's process id.
+
+    Returns:
+    - dict: 'master' and 'workers' (a list) of process_memory results, plus 'total_pss' in MB.
+    """
+
+    master = process_memory(master_pid)
+    workers = [process_memory(pid) for pid in child_pids(master_pid)]
+    total_pss = master['pss'] + sum(worker['pss'] for worker in workers)
+
+    print(f"{'process':>10} {'rss':>9} {'pss':>9} {'shared':>9} {'unique':>9}   (MB)")
+    print(f"{'master':>10} {master['rss']:>9.1f} {master['pss']:>9.1f} {master['shared']:>9.1f} {master['unique']:>9.1f}")
+    for number, worker in enumerate(workers, start=1):
+        print(f"{'worker ' + str(number):>10} {worker['rss']:>9.1f} {worker['pss']:>9.1f} {worker['shared']:>9.1f} "
+              f"{worker['unique']:>9.1f}")
+    print(f"Total PSS across master and {len(workers)} workers: {total_pss:.1f} MB")
+    return {'master': master, 'workers': workers, 'total_pss': total_pss}
+
+
+def measure_gunicorn(workers: int, shared_data: bool = True, port: int = 8050, requests: int = 5,
+                     timeout: int = 300) -> dict:
+
+    """
+    Start the app under gunicorn with its deployment config, warm it up and report the workers' memory.
+
+    Parameters:
+    - workers (int): The number of gunicorn workers.
+    - shared_data (bool): Preload the app in the master (STRENGTHPULSE_SHARED_DATA) or load it in every worker.
+    - port (int): The local port to bind.
+    - requests (int): Requests made to the app before measuring, so the workers have served some traffic.
+    - timeout (int): Seconds to wait for the workers to come up.
+
+    Returns:
+    - dict: As report_memory.
+    """
+
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), STRENGTHPULSE_SHARED_DATA='1' if shared_data else '0')
+    master = subprocess.Popen([sys.executable, '-m', 'gunicorn', '--chdir', 'src', '--config', 'src/gunicorn.conf.py',
+                               '--bind', f"127.0.0.1:{port}", 'app:server'], cwd=REPO_DIR, env=env)
+    try:
+        deadline = time.time() + timeout
+        while True:
+            if master.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with code {master.returncode}")
+            try:
+                if len(child_pids(master.pid)) == workers:
+                    urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=timeout)
+                    break
+            except OSError:
+                pass
+            if time.time() > deadline:
+                raise RuntimeError(f"gunicorn didn't start {workers} workers within {timeout} seconds")
+            time.sleep(1)
+
+        for _ in range(requests * workers):
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=timeout).read()
+        # Without preload each worker loads the app itself, and the first response only means one of them is done
+        wait_until_settled(master.pid, deadline)
+
+        print(f"\n{workers} workers, shared data {'on' if shared_data else 'off'}:")
+        return report_memory(master.pid)
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report per-worker unique and shared memory of the app under gunicorn.")
+    parser.add_argument('--pid', type=int, help="Measure an already running gunicorn master instead of starting one.")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--requests', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.pid:
+        report_memory(args.pid)
+    else:
+        for shared_data in (False, True):
+            for workers in args.workers:
+                measure_gunicorn(workers, shared_data, args.port, args.requests)
@@ -1,6 +1,6 @@
 import os
 from postgres_ingestion import PowerliftingDataHandler, PowerliftingDataRetriever
-from datetime import datetime
+from datetime import datetime, timedelta
 import time
 from config import DATABASE_URL
 
@@ -8,13 +8,16 @@ from config import DATABASE_URL
 os.environ['DATABASE_URL'] = DATABASE_URL  #this value is stored in the config.py file and in the app environment vars - uncomment to use locally
 database_url = os.environ.get('DATABASE_URL') #this value is stored in the config.py file and in the app environment vars
 
-def etl_openpl_postgres(database_url: str) -> None:
+def etl_openpl_postgres(database_url: str, pipelined: bool = False, lookback_days: int = 90) -> None:
 
     """
     Perform ETL (Extract, Transform, Load) process from OpenPowerlifting to a PostgreSQL Database.
 
     Parameters:
     - database_url (str): The URL of the PostgreSQL database.
+    - pipelined (bool): Overlap parsing, rendering and COPY instead of extracting everything before loading.
+    - lookback_days (int): Re-extract meets this many days before the latest loaded date, so meets back-filled or
+      corrected upstream are picked up. Those rows are upserted, which also makes reruns safe.
 
     Returns:
     None
@@ -24,9 +27,25 @@ def etl_openpl_postgres(database_url: str) -> None:
     postgres_instance = PowerliftingDataHandler(database_url)
     data_collector = PowerliftingDataRetriever()
 
+    # Conditional fetch of the archive: a 304 (or an unchanged content hash) means the last load is still current
+    print("Checking OpenPowerlifting for a new archive...")
+    if data_collector.download_archive() is None:
+        print("Failed to retrieve the zip file.")
+        return
+    if postgres_instance.archive_already_loaded('powerlifting_data', data_collector.archive_sha256):
+        print("OpenPowerlifting archive is unchanged since the last load. Nothing to do.")
+        return
+
+    # One-off conversion of a table created with text dates and categories; a no-op once it is typed
+    postgres_instance.migrate_column_types('powerlifting_data')
+    # Rolling retention window; only applies once powerlifting_data is partitioned by year
+    postgres_instance.drop_expired_partitions('powerlifting_data')
+
     try:
         openpl_updated_dt = datetime.strptime(data_collector.retrieve_last_updated_date().rstrip('.'), '%Y-%m-%d')
-        current_max_dt = datetime.strptime(postgres_instance.collect_max_dt('powerlifting_data'), '%Y-%m-%d')
+        current_max_dt = postgres_instance.collect_max_dt('powerlifting_data')
+        # An empty table has no max date yet
+        current_max_dt = None if current_max_dt is None else datetime.strptime(current_max_dt, '%Y-%m-%d')
     except ValueError as e:
         print(f"Error parsing dates: {e}")
         return
@@ -34,16 +53,49 @@ def etl_openpl_postgres(database_url: str) -> None:
     print(f"Collected dates.\nOpenPowerlifting was last updated on {openpl_updated_dt}.")
     time.sleep(1)
 
-    print(f"Most recent date in powerlifting_data Database is {current_max_dt}.")
-    time.sleep(2)
+    if current_max_dt is not None:
+        print(f"Most recent date in powerlifting_data Database is {current_max_dt}.")
+        time.sleep(2)
 
     current_record_count = postgres_instance.collect_cnt_records('powerlifting_data')
     print(f"Current record count in powerlifting_data Database: {current_record_count}")
     print("Checking for newly available records to ingest...")
     time.sleep(1)
 
+    # A load into an empty table takes the full extract and builds its indexes once afterwards instead of maintaining
+    # them row by row; otherwise the look-back window overlaps rows already loaded, so they are merged on their
+    # natural key
+    upsert = current_max_dt is not None
+    if upsert:
+        filter_date = current_max_dt - timedelta(days=lookback_days)
+        print(f"Re-checking meets since {filter_date.date()} for upstream corrections.")
+    else:
+        filter_date = None
+        print("powerlifting_data is empty. Loading the full extract.")
+        postgres_instance.drop_indexes('powerlifting_data')
+
+    if pipelined:
+        # Rows are loaded while they are still being extracted, so confirm before anything starts
+        etl_input = input("Proceed with pipelined ETL to Postgres Database? (y/n)").lower()
+        if etl_input != 'y':
+            print("Canceling ETL. Data will not be ingested into Postgres Database.")
+            return
+
+        print("Extracting and loading data from OpenPowerlifting...")
+        source_chunks = data_collector.stream_subset_from_csv(filter_date=filter_date)
+        records_loaded = postgres_instance.load_pipelined(source_chunks, table_name='powerlifting_data',
+                                                          upstream_updated=openpl_updated_dt.date(),
+                                                          archive_sha256=data_collector.archive_sha256, upsert=upsert)
+        postgres_instance.create_indexes('powerlifting_data')
+        postgres_instance.build_clean_view('powerlifting_data')
+        postgres_instance.write_snapshot('powerlifting_data')
+        # A load records its archive itself; this covers an extract without new rows
+        postgres_instance.mark_archive_loaded('powerlifting_data', data_collector.archive_sha256)
+        print(f"Loaded {records_loaded} new records into powerlifting_data Database.")
+        return
+
     print("Extracting data from OpenPowerlifting...")
-    source_data = data_collector.process_subset_from_csv(filter_date=current_max_dt)
+    source_data = data_collector.process_subset_from_csv(filter_date=filter_date)
 
     if len(source_data) > 0:
         while True:
@@ -52,7 +104,13 @@ def etl_openpl_postgres(database_url: str) -> None:
 
             if etl_input == 'y':
                 print("Loading data into powerlifting_data Database...")
-                postgres_instance.insert_data(csv_data=source_data, table_name='powerlifting_data')
+                postgres_instance.insert_data(csv_data=source_data, table_name='powerlifting_data',
+                                              upstream_updated=openpl_updated_dt.date(),
+                                              archive_sha256=data_collector.archive_sha256, upsert=upsert)
+                postgres_instance.create_indexes('powerlifting_data')
+                # The app reads powerlifting_clean, so business rules run here once rather than on every app start
+                postgres_instance.build_clean_view('powerlifting_data')
+                postgres_instance.write_snapshot('powerlifting_data')
                 print("Data is now available in powerlifting_data Database.")
                 current_record_count = postgres_instance.collect_cnt_records('powerlifting_data')
                 print(f"Current record count in powerlifting_data Database: {current_record_count}")
@@ -63,6 +121,10 @@ def etl_openpl_postgres(database_url: str) -> None:
             else:
                 print("Invalid input. Please enter 'y' or 'n'.")
     else:
+        # Rebuilt anyway so its retention window keeps up with the calendar
+        postgres_instance.build_clean_view('powerlifting_data')
+        postgres_instance.write_snapshot('powerlifting_data')
+        postgres_instance.mark_archive_loaded('powerlifting_data', data_collector.archive_sha256)
         print("No additional records available. Data is already up to date in powerlifting_data Database.")
 
 
@@ -1,10 +1,472 @@
 import psycopg2
-from data_retrieval import PowerliftingDataRetriever
-from psycopg2 import sql
+from data_retrieval import PowerliftingDataRetriever, APP_COLUMNS
+from psycopg2 import sql, pool
 import pandas as pd
+import numpy as np
 import logging
-from io import StringIO
-from data_cleaning import remove_special_chars, convert_kg_to_lbs, apply_business_rules
+import os
+import queue
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import chain
+from data_cleaning import remove_special_chars, apply_business_rules, encode_app_dtypes
+from data_snapshot import write_snapshot, read_snapshot_manifest, load_snapshot
+
+IGNORE_COLUMN_NAMES = ['Sanctioned']
+
+# Meet years kept for the app, including the current one
+RETENTION_YEARS = 7
+
+# Where the ETL leaves the app's columnar snapshot, next to src/app.py. It is build output and not committed; a
+# deployment without one writes it on first start (see load_app_data)
+APP_SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'snapshot')
+
+# Identifies a row across loads: one lifter's entry in a division, event and equipment category at one meet
+NATURAL_KEY = ['Name', 'Date', 'MeetName', 'Federation', 'Division', 'Event', 'Equipment']
+
+# Enum types for the low-cardinality text columns, with the labels OpenPowerlifting documents
+POWERLIFTING_ENUM_TYPES = {
+    'Sex': ('opl_sex', ['M', 'F', 'Mx']),
+    'Event': ('opl_event', ['SBD', 'BD', 'SD', 'SB', 'S', 'B', 'D']),
+    'Equipment': ('opl_equipment', ['Raw', 'Wraps', 'Single-ply', 'Multi-ply', 'Unlimited', 'Straps']),
+    'Tested': ('opl_tested', ['Yes']),
+}
+
+# Declared PostgreSQL types for the OpenPowerlifting columns; anything not listed falls back to the dtype mapping
+POWERLIFTING_COLUMN_TYPES = {
+    'Date': 'DATE',
+    **{col: 'REAL' for col in ['Age', 'BodyweightKg', 'Squat1Kg', 'Squat2Kg', 'Squat3Kg', 'Squat4Kg', 'Best3SquatKg',
+                               'Bench1Kg', 'Bench2Kg', 'Bench3Kg', 'Bench4Kg', 'Best3BenchKg', 'Deadlift1Kg',
+                               'Deadlift2Kg', 'Deadlift3Kg', 'Deadlift4Kg', 'Best3DeadliftKg', 'TotalKg', 'Dots',
+                               'Wilks', 'Glossbrenner', 'Goodlift']},
+    **{col: type_name for col, (type_name, _) in POWERLIFTING_ENUM_TYPES.items()},
+}
+
+# How information_schema.columns reports each declared type
+PG_INFORMATION_SCHEMA_TYPES = {
+    'DATE': 'date',
+    'REAL': 'real',
+    'INTEGER': 'integer',
+    'SMALLINT': 'smallint',
+    'VARCHAR(255)': 'character varying',
+}
+
+# The columns fetch_data hands to the app, with the dtypes they are parsed into
+FETCH_COLUMNS = [col for col in APP_COLUMNS if col != 'MeetCountry']
+FETCH_DTYPES = {col: 'float64' if POWERLIFTING_COLUMN_TYPES.get(col) == 'REAL' else 'object'
+                for col in FETCH_COLUMNS if col != 'Date'}
+
+# Rows the app never shows, filtered out before the business rules
+APP_ROW_FILTER = """"Age" IS NOT NULL AND "Place" != 'DQ' AND "MeetCountry" = 'USA'"""
+
+# Materialized views holding each table's app rows with apply_business_rules already applied
+CLEAN_VIEWS = {'powerlifting_data': 'powerlifting_clean'}
+
+# SQL equivalents of remove_special_chars and apply_business_rules; empty strings count as missing, as they do once
+# the rows are parsed by read_csv
+CLEAN_VIEW_EXPRESSIONS = {
+    'AgeClass': """COALESCE(NULLIF("AgeClass", ''), NULLIF("BirthYearClass", ''))""",
+    'WeightClassKg': """replace("WeightClassKg", '+', '')""",
+    'Tested': """CASE WHEN "Tested"::text = 'Yes' THEN 'Yes' ELSE 'Not Known' END""",
+}
+# Rows with neither an age class nor a birth year class are left out, where apply_business_rules raises instead
+CLEAN_VIEW_FILTER = (""""Date" >= '2013-01-01' AND NULLIF("WeightClassKg", '') IS NOT NULL AND "Age" >= 13 """
+                     """AND COALESCE(NULLIF("AgeClass", ''), NULLIF("BirthYearClass", '')) IS NOT NULL""")
+
+# Index plan for the app's access paths as (name suffix, columns); equality-filtered columns lead each composite index
+POWERLIFTING_INDEXES = [
+    ('cohort', ['Sex', 'Federation', 'AgeClass', 'WeightClassKg', 'Tested']),
+    ('lifter', ['Name', 'Event']),
+    ('federation_state', ['Federation', 'MeetState']),
+    ('date', ['Date']),
+]
+
+# One representative query per access path, EXPLAINed by check_index_usage
+APP_QUERY_SHAPES = {
+    'cohort': ('SELECT * FROM {} WHERE "Sex" = %s AND "Federation" IN %s AND "AgeClass" IN %s '
+               'AND "WeightClassKg" IN %s AND "Tested" = %s', ('M', ('USAPL',), ('24-34',), ('93',), 'Yes')),
+    'lifter': ('SELECT * FROM {} WHERE "Name" = %s AND "Event" = %s', ('John Doe', 'SBD')),
+    'federation_state': ('SELECT "Wilks" FROM {} WHERE "Federation" IN %s AND "MeetState" IN %s',
+                         (('USAPL',), ('TX',))),
+    'max_date': ('SELECT MAX("Date") FROM {}', ()),
+}
+
+# PGCOPY signature, flags field and header extension length, then the -1 field count that ends the stream
+BINARY_COPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + np.array([0, 0], dtype='>i4').tobytes()
+BINARY_COPY_TRAILER = np.array([-1], dtype='>i2').tobytes()
+
+# Fixed-width PostgreSQL types and the big-endian NumPy dtype of their binary wire format
+BINARY_NUMERIC_TYPES = {
+    'smallint': '>i2',
+    'integer': '>i4',
+    'bigint': '>i8',
+    'real': '>f4',
+    'double precision': '>f8',
+}
+BINARY_TEXT_TYPES = {'character varying', 'character', 'text', 'USER-DEFINED'}
+PG_EPOCH = np.datetime64('2000-01-01', 'D')
+
+# Marks the end of a pipeline queue
+END_OF_STREAM = object()
+
+
+class PipelineError:
+    """
+    Carries an exception raised in one pipeline stage to the next stage.
+    """
+
+    def __init__(self, error):
+        self.error = error
+
+
+class PartitionsNeeded:
+    """
+    Ends the COPY reading a pipeline queue, so the yearly partitions the next chunk needs can be created first.
+    """
+
+    def __init__(self, years):
+        self.years = years
+
+
+class BinaryEncodingError(ValueError):
+    """
+    Raised when a value can't be encoded for its binary COPY column, where the CSV path's COPY would raise a
+    DataError. copy_with_quarantine isolates the offending rows either way.
+    """
+
+
+def get_until_stopped(source_queue, stop_event):
+    """
+    Get an item from a pipeline queue, returning END_OF_STREAM once the pipeline has been stopped.
+    """
+
+    while not stop_event.is_set():
+        try:
+            return source_queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return END_OF_STREAM
+
+
+def put_until_stopped(target_queue, item, stop_event):
+    """
+    Put an item on a bounded queue, giving up once the pipeline has been stopped.
+
+    Returns:
+    - bool: True if the item was queued.
+    """
+
+    while not stop_event.is_set():
+        try:
+            target_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def missing_values(values):
+    """
+    Flag the values binary COPY sends as NULL without error: missing values and, as with CSV COPY, empty strings.
+    """
+
+    return values.isna().to_numpy() | (values.astype(object) == '').to_numpy()
+
+
+def raise_invalid(values, invalid, data_type):
+    """
+    Raise BinaryEncodingError naming the first value flagged in the boolean mask invalid, if any.
+    """
+
+    if invalid.any():
+        count = int(invalid.sum())
+        raise BinaryEncodingError(f'invalid input for type {data_type}: {values[invalid].iloc[0]!r}'
+                                  + (f' and {count - 1} more' if count > 1 else ''))
+
+
+def encode_binary_column(values, data_type):
+    """
+    Encode one column into PGCOPY field values.
+
+    Parameters:
+    - values (pd.Series): The column to encode.
+    - data_type (str): The PostgreSQL data type from information_schema.columns.
+
+    Returns:
+    - tuple: (sizes, data) where sizes is the byte length of each row's value (-1 for NULL)
+      and data is a flat uint8 array of the non-NULL values in row order.
+
+    Missing values and empty strings are sent as NULL in every type, like CSV COPY does. Values that don't convert
+    to the column's type, fractional values for integer columns and values out of the type's range raise
+    BinaryEncodingError instead of being sent as NULL or a changed value.
+    """
+
+    if data_type in BINARY_NUMERIC_TYPES:
+        numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        nulls = np.isnan(numbers)
+        if values.dtype.kind not in 'biuf':
+            raise_invalid(values, nulls & ~missing_values(values), data_type)
+        wire_dtype = np.dtype(BINARY_NUMERIC_TYPES[data_type])
+        present = numbers[~nulls]
+        if wire_dtype.kind == 'i':
+            limits = np.iinfo(wire_dtype)
+            invalid = (present != np.rint(present)) | (present < limits.min) | (present > limits.max)
+        else:
+            invalid = np.isfinite(present) & (np.abs(present) > np.finfo(wire_dtype).max)
+        raise_invalid(values[~nulls], invalid, data_type)
+        data = present.astype(wire_dtype).view(np.uint8)
+        sizes = np.where(nulls, -1, wire_dtype.itemsize)
+    elif data_type == 'date':
+        days = pd.to_datetime(values, errors='coerce').to_numpy(dtype='datetime64[D]')
+        nulls = np.isnat(days)
+        if values.dtype.kind != 'M':
+            raise_invalid(values, nulls & ~missing_values(values), data_type)
+        data = (days[~nulls] - PG_EPOCH).astype('>i4').view(np.uint8)
+        sizes = np.where(nulls, -1, 4)
+    elif data_type == 'boolean':
+        nulls = missing_values(values)
+        data = values[~nulls].astype(bool).to_numpy().astype(np.uint8)
+        sizes = np.where(nulls, -1, 1)
+    elif data_type in BINARY_TEXT_TYPES:
+        # Empty strings are sent as NULL, as the CSV path's COPY reads an unquoted empty field
+        nulls = missing_values(values)
+        text = list(map(str, values.to_numpy()[~nulls]))
+        lengths = np.fromiter(map(len, text), dtype=np.int64, count=len(text))
+        joined = ''.join(text).encode('utf-8')
+        if len(joined) != lengths.sum():
+            # non-ASCII text, so byte lengths differ from character lengths
+            lengths = np.fromiter((len(value.encode('utf-8')) for value in text), dtype=np.int64, count=len(text))
+        data = np.frombuffer(joined, dtype=np.uint8)
+        sizes = np.full(len(values), -1)
+        sizes[~nulls] = lengths
+    else:
+        raise ValueError(f'Binary COPY does not support columns of type {data_type}')
+
+    return sizes.astype(np.int64), data
+
+
+def encode_binary_copy_rows(frame, table_columns) -> bytes:
+    """
+    Encode DataFrame rows as PGCOPY tuples laid out like the target table.
+
+    Each column is encoded as a whole, then scattered into its place in every tuple, so no Python work is done
+    per numeric cell. Table columns missing from the frame are sent as NULL.
+
+    Parameters:
+    - frame (pd.DataFrame): The rows to encode.
+    - table_columns (list of tuple): (column_name, data_type) pairs in table order.
+
+    Returns:
+    - bytes: The encoded tuples, without the PGCOPY header or trailer.
+    """
+
+    row_count = len(frame)
+    encoded_columns = []
+    for column_name, data_type in table_columns:
+        if column_name in frame.columns:
+            try:
+                encoded_columns.append(encode_binary_column(frame[column_name], data_type))
+            except BinaryEncodingError as e:
+                raise BinaryEncodingError(f'column {column_name}: {e}') from None
+        else:
+            encoded_columns.append((np.full(row_count, -1, dtype=np.int64), np.empty(0, dtype=np.uint8)))
+
+    # Each tuple is an int16 field count followed by an int32 length and the value bytes per field
+    row_sizes = np.full(row_count, 2, dtype=np.int64)
+    for sizes, _ in encoded_columns:
+        row_sizes += 4 + np.maximum(sizes, 0)
+    row_starts = np.cumsum(row_sizes) - row_sizes
+    output = np.empty(int(row_sizes.sum()), dtype=np.uint8)
+
+    def write_fixed(positions, numbers, dtype):
+        raw = np.asarray(numbers).astype(dtype).view(np.uint8).reshape(-1, np.dtype(dtype).itemsize)
+        output[positions[:, None] + np.arange(raw.shape[1])] = raw
+
+    write_fixed(row_starts, np.full(row_count, len(table_columns)), '>i2')
+    positions = row_starts + 2
+    for sizes, data in encoded_columns:
+        write_fixed(positions, sizes, '>i4')
+        positions = positions + 4
+        value_sizes = np.maximum(sizes, 0)
+        if data.size:
+            source_starts = np.cumsum(value_sizes) - value_sizes
+            output[np.repeat(positions - source_starts, value_sizes) + np.arange(data.size)] = data
+        positions = positions + value_sizes
+
+    return output.tobytes()
+
+
+def peek_chunks(chunks):
+    """
+    Look ahead to the first non-empty chunk of a chunk iterator, e.g. to set up the table before COPY starts.
+    The filtered chunks of an incremental extract are mostly empty, so the first one rarely says anything about
+    the rows being loaded.
+
+    Parameters:
+    - chunks (iterable of pd.DataFrame): The chunks to be loaded.
+
+    Returns:
+    - tuple: (the first non-empty chunk, or the last chunk if all of them are empty, or None if there are none;
+      an iterator over the chunks from that one on). Empty chunks skipped on the way are dropped.
+    """
+
+    chunks = iter(chunks)
+    first_chunk = None
+    for first_chunk in chunks:
+        if not first_chunk.empty:
+            break
+    if first_chunk is None:
+        return None, iter(())
+    return first_chunk, chain([first_chunk], chunks)
+
+
+def find_unknown_enum_values(chunk, enum_labels):
+    """
+    Flag the rows of a chunk whose enum columns hold a value their enum type doesn't allow, which would make COPY
+    fail.
+
+    Parameters:
+    - chunk (pd.DataFrame): The rows to check.
+    - enum_labels (dict): Column name to (enum type name, set of allowed labels), from get_enum_labels.
+
+    Returns:
+    - np.ndarray: The error for each row, worded like PostgreSQL's own, or None where the row is allowed.
+    """
+
+    errors = np.full(len(chunk), None, dtype=object)
+    for column_name, (type_name, labels) in enum_labels.items():
+        if column_name not in chunk.columns:
+            continue
+        values = chunk[column_name].astype(object)
+        text = values.astype(str)
+        # Empty strings are loaded as NULL, so they need no label
+        unknown = (values.notna() & (text != '') & ~text.isin(labels)).to_numpy() & pd.isna(errors)
+        errors[unknown] = [f'invalid input value for enum {type_name}: "{value}"' for value in text[unknown]]
+    return errors
+
+
+def iter_row_batches(chunks, batch_size=10000, columns=None):
+    """
+    Split DataFrame chunks into batches of at most batch_size rows, as COPY streams and quarantined loads consume them.
+
+    Parameters:
+    - chunks (iterable of pd.DataFrame): The frames to split.
+    - batch_size (int): The maximum number of rows per batch.
+    - columns (list of str): Reindex every chunk to exactly these columns in this order, to match a COPY column list.
+
+    Yields:
+    - pd.DataFrame: The next batch, without IGNORE_COLUMN_NAMES. Empty chunks yield nothing.
+    """
+
+    for chunk in chunks:
+        chunk = chunk.drop(columns=IGNORE_COLUMN_NAMES, errors='ignore')
+        if columns is not None:
+            chunk = chunk.reindex(columns=columns)
+        for position in range(0, len(chunk), batch_size):
+            yield chunk.iloc[position:position + batch_size]
+
+
+class CopyStreamReader:
+    """
+    A file-like object for copy_expert that reads a COPY stream from an iterator of pieces, CSV text or PGCOPY
+    bytes alike. read() only keeps the unread remainder of the current piece in memory, so pieces are produced as
+    COPY asks for them.
+
+    Attributes:
+    - pieces (iterator of str or bytes): The stream, one piece at a time.
+    - empty (str or bytes): The empty value of the stream's type, returned once the pieces run out.
+    """
+
+    def __init__(self, pieces, empty=''):
+        self.pieces = iter(pieces)
+        self.buffer = empty
+        self.offset = 0
+        self.finished = False
+
+    def read(self, size=-1):
+        while not self.finished and (size < 0 or len(self.buffer) - self.offset < size):
+            piece = next(self.pieces, None)
+            if piece is None:
+                self.finished = True
+            else:
+                self.buffer = self.buffer[self.offset:] + piece
+                self.offset = 0
+
+        end = len(self.buffer) if size < 0 else self.offset + size
+        data = self.buffer[self.offset:end]
+        self.offset += len(data)
+        return data
+
+
+class DataFrameCsvReader(CopyStreamReader):
+    """
+    A COPY stream of DataFrame rows rendered to CSV lazily, batch_size rows at a time.
+
+    Parameters:
+    - chunks (iterable of pd.DataFrame): The frames to render.
+    - batch_size (int): The number of rows rendered per to_csv call.
+    - columns (list of str): Render exactly these columns in this order, to match a COPY column list.
+    """
+
+    def __init__(self, chunks, batch_size=10000, columns=None):
+        super().__init__(batch.to_csv(index=False, header=False)
+                         for batch in iter_row_batches(chunks, batch_size, columns))
+
+
+class BinaryCopyReader(CopyStreamReader):
+    """
+    A COPY stream of DataFrame rows encoded as PGCOPY binary tuples, batch_size rows at a time.
+
+    Parameters:
+    - chunks (iterable of pd.DataFrame): The frames to encode.
+    - table_columns (list of tuple): (column_name, data_type) pairs in table order.
+    - batch_size (int): The number of rows encoded at a time.
+    - eager (bool): Encode every batch up front, so a BinaryEncodingError is raised here instead of cancelling the
+      COPY partway through, which psycopg2 reports as a QueryCanceled error.
+    """
+
+    def __init__(self, chunks, table_columns, batch_size=10000, eager=False):
+        encoded_batches = (encode_binary_copy_rows(batch, table_columns)
+                           for batch in iter_row_batches(chunks, batch_size))
+        if eager:
+            encoded_batches = list(encoded_batches)
+        super().__init__(chain([BINARY_COPY_HEADER], encoded_batches, [BINARY_COPY_TRAILER]), empty=b'')
+
+
+class QueueReader(CopyStreamReader):
+    """
+    A COPY stream of rendered CSV text read from a pipeline queue.
+
+    Attributes:
+    - source_queue (queue.Queue): Queue of CSV strings, ended by END_OF_STREAM.
+    - error (Exception): The error a pipeline stage passed down the queue, if any.
+    - partition_years (list of int): The years a PartitionsNeeded marker ended the stream for, if one did; the rest
+      of the queue is left for the next reader.
+    """
+
+    def __init__(self, source_queue):
+        self.source_queue = source_queue
+        self.error = None
+        self.partition_years = None
+        super().__init__(self.drain_queue())
+
+    def drain_queue(self):
+        while True:
+            item = self.source_queue.get()
+            if item is END_OF_STREAM:
+                return
+            if isinstance(item, PartitionsNeeded):
+                self.partition_years = item.years
+                return
+            if isinstance(item, PipelineError):
+                self.error = item.error
+                raise item.error
+            yield item
+
 
 class PowerliftingDataHandler:
     """
@@ -15,29 +477,123 @@ class PowerliftingDataHandler:
     - data_retriever (PowerliftingDataRetriever): An instance of PowerliftingDataRetriever for data retrieval.
     """
 
-    def __init__(self, database_url):
+    def __init__(self, database_url, min_connections=1, max_connections=8, health_check_interval=30):
         """
         Constructor for PowerliftingDataHandler.
 
         Parameters:
         - database_url (str): The URL of the PostgreSQL database.
+        - min_connections (int): Connections the pool keeps open.
+        - max_connections (int): Connections the pool may open at once.
+        - health_check_interval (float): Seconds a pooled connection may sit idle before it is checked on checkout.
         """
 
         self.database_url = database_url
         self.data_retriever = PowerliftingDataRetriever()
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self.health_check_interval = health_check_interval
+        self.connection_pool = None
+        self.connection_slots = None
+        self.pool_pid = None
+        self.pool_lock = threading.Lock()
+        self.connection_last_used = {}
+
+    def get_connection_pool(self):
+        """
+        Return the handler's connection pool, creating it on first use. A process forked after the pool was created
+        (e.g. a preloaded web worker) gets a pool of its own rather than sharing the parent's sockets.
+
+        Returns:
+        - ThreadedConnectionPool: The pool.
+        """
+
+        with self.pool_lock:
+            if self.connection_pool is None or self.pool_pid != os.getpid():
+                self.connection_pool = pool.ThreadedConnectionPool(self.min_connections, self.max_connections,
+                                                                   self.database_url)
+                # The pool raises instead of waiting when it is exhausted, so checkouts queue on a semaphore
+                self.connection_slots = threading.BoundedSemaphore(self.max_connections)
+                self.pool_pid = os.getpid()
+                self.connection_last_used = {}
+            return self.connection_pool
+
+    def connection_is_healthy(self, conn) -> bool:
+        """
+        Check a pooled connection before handing it out. Connections used recently are trusted; ones idle for longer
+        than health_check_interval are pinged, since a server or proxy may have dropped them.
+        """
+
+        if conn.closed:
+            return False
+        if time.monotonic() - self.connection_last_used.get(id(conn), 0) < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection from the pool for the duration of a with block.
+
+        Broken connections are discarded and replaced, so the caller always starts with a live connection. Any
+        transaction left open when the block exits is rolled back by the pool before the connection is reused. When
+        all max_connections are in use the caller waits for one to be returned.
+
+        Yields:
+        - connection: A psycopg2 connection.
+        """
+
+        connection_pool = self.get_connection_pool()
+        connection_slots = self.connection_slots
+        connection_slots.acquire()
+        try:
+            conn = connection_pool.getconn()
+            while not self.connection_is_healthy(conn):
+                logging.warning("Replacing a broken database connection")
+                self.connection_last_used.pop(id(conn), None)
+                connection_pool.putconn(conn, close=True)
+                conn = connection_pool.getconn()
+            try:
+                yield conn
+            finally:
+                self.connection_last_used[id(conn)] = time.monotonic()
+                connection_pool.putconn(conn, close=bool(conn.closed))
+        finally:
+            connection_slots.release()
+
+    def close(self) -> None:
+        """
+        Close every pooled connection.
+        """
+
+        with self.pool_lock:
+            if self.connection_pool is not None and self.pool_pid == os.getpid():
+                self.connection_pool.closeall()
+            self.connection_pool = None
+
     @staticmethod
-    def get_pg_datatype(pandas_dtype):
+    def get_pg_datatype(pandas_dtype, column_name=None):
         """
         Doesn't depend on any instance calls so making it a static method
         Map pandas data types to PostgreSQL data types.
 
         Parameters:
         - pandas_dtype: The pandas data type.
+        - column_name (str): The column's name; columns in POWERLIFTING_COLUMN_TYPES get their declared type.
 
         Returns:
         - str: Corresponding PostgreSQL data type.
         """
 
+        if column_name in POWERLIFTING_COLUMN_TYPES:
+            return POWERLIFTING_COLUMN_TYPES[column_name]
+
         dtype_mapping = {
             'int64': 'INTEGER',
             'float64': 'REAL',
@@ -46,213 +602,1500 @@ class PowerliftingDataHandler:
         }
         return dtype_mapping.get(str(pandas_dtype), 'VARCHAR(255)')  # Default to VARCHAR(255) for unknown types
 
-    def create_table(self, csv_data, table_name)-> None:
+    def create_table(self, csv_data, table_name, partition_by_year=False)-> None:
         """
          Create a PostgreSQL table based on the structure of a DataFrame.
 
          Parameters:
          - csv_data (pd.DataFrame): The DataFrame containing the data structure.
          - table_name (str): The name of the table to be created.
+         - partition_by_year (bool): Range-partition the table on "Date", one partition per meet year, so old years
+           can be dropped by drop_expired_partitions and date-restricted queries only scan the years they need.
 
          Returns:
          None
          """
 
-        # Establish a connection to the PostgreSQL database
-        conn = psycopg2.connect(self.database_url)
-        cur = conn.cursor()
-
-        # Check if the table already exists
-        table_exists_query = sql.SQL(
-            "SELECT EXISTS (SELECT 1 FROM information_schema.tables WHERE table_name = {});").format(
-            sql.Literal(table_name))
-        cur.execute(table_exists_query)
-        table_exists = cur.fetchone()[0]
-
-        if table_exists:
-            # Table already exists, ask if it needs to be dropped
-            record_count_query = sql.SQL("SELECT COUNT(*) FROM {};").format(sql.Identifier(table_name))
-            cur.execute(record_count_query)
-            total_records = cur.fetchone()[0]
-            drop_table_input = input(
-                f"Table '{table_name}' already exists with {total_records} records. Do you want to drop and recreate it? (y/n): ").lower()
-
-            if drop_table_input == 'y':
-                drop_table_query = sql.SQL("DROP TABLE IF EXISTS {} CASCADE;").format(sql.Identifier(table_name))
-                cur.execute(drop_table_query)
-                conn.commit()
+        # Borrow a pooled connection to the PostgreSQL database
+        with self.connection() as conn, conn.cursor() as cur:
+            # Check if the table already exists
+            table_exists_query = sql.SQL(
+                "SELECT EXISTS (SELECT 1 FROM information_schema.tables WHERE table_name = {});").format(
+                sql.Literal(table_name))
+            cur.execute(table_exists_query)
+            table_exists = cur.fetchone()[0]
+
+            if table_exists:
+                # Table already exists, ask if it needs to be dropped
+                record_count_query = sql.SQL("SELECT COUNT(*) FROM {};").format(sql.Identifier(table_name))
+                cur.execute(record_count_query)
+                total_records = cur.fetchone()[0]
+                drop_table_input = input(
+                    f"Table '{table_name}' already exists with {total_records} records. Do you want to drop and recreate it? (y/n): ").lower()
+
+                if drop_table_input == 'y':
+                    drop_table_query = sql.SQL("DROP TABLE IF EXISTS {} CASCADE;").format(sql.Identifier(table_name))
+                    cur.execute(drop_table_query)
+                    # The recreated table starts without recorded loads
+                    if self.get_dataset_state(cur, table_name) is not None:
+                        cur.execute('DELETE FROM dataset_state WHERE "TableName" = %s;', (table_name,))
+                    conn.commit()
+
+                    # Create the table with the same structure as the DataFrame
+                    self.create_enum_types(cur)
+                    create_table_query = self.build_create_table_query(csv_data, table_name, partition_by_year)
 
-                # Create the table with the same structure as the DataFrame
-                create_table_query = sql.SQL("CREATE TABLE {} ({});").format(
-                    sql.Identifier(table_name),
-                    sql.SQL(', ').join(
-                        [sql.SQL("{} {}").format(sql.Identifier(col),
-                                                 sql.SQL(self.get_pg_datatype(csv_data.dtypes[col]))) for
-                         col in csv_data.columns])
-                )
+                    print(f"Creating table '{table_name}' with query:")
+                    print(create_table_query.as_string(conn))
+                    cur.execute(create_table_query)
+                    if partition_by_year:
+                        self.create_year_partitions(cur, table_name, self.data_years(csv_data))
+                    conn.commit()
+                elif drop_table_input == 'n':
+                    print(f"Table '{table_name}' already exists. Leaving it as is.")
+                else:
+                    print('Not a valid option. Please type y/n.')
+            else:
+                # Table doesn't exist, proceed with creating it
+                self.create_enum_types(cur)
+                create_table_query = self.build_create_table_query(csv_data, table_name, partition_by_year)
 
                 print(f"Creating table '{table_name}' with query:")
                 print(create_table_query.as_string(conn))
                 cur.execute(create_table_query)
+                if partition_by_year:
+                    self.create_year_partitions(cur, table_name, self.data_years(csv_data))
                 conn.commit()
-            elif drop_table_input == 'n':
-                print(f"Table '{table_name}' already exists. Leaving it as is.")
-            else:
-                print('Not a valid option. Please type y/n.')
-        else:
-            # Table doesn't exist, proceed with creating it
-            create_table_query = sql.SQL("CREATE TABLE {} ({});").format(
-                sql.Identifier(table_name),
-                sql.SQL(', ').join(
-                    [sql.SQL("{} {}").format(sql.Identifier(col), sql.SQL(self.get_pg_datatype(csv_data.dtypes[col])))
-                     for col in
-                     csv_data.columns])
-            )
-
-            print(f"Creating table '{table_name}' with query:")
-            print(create_table_query.as_string(conn))
-            cur.execute(create_table_query)
-            conn.commit()
 
+    def build_create_table_query(self, csv_data, table_name, partition_by_year=False):
+        """
+        Build the CREATE TABLE statement for a DataFrame's columns.
+
+        Parameters:
+        - csv_data (pd.DataFrame): The DataFrame containing the data structure.
+        - table_name (str): The name of the table to be created.
+        - partition_by_year (bool): Declare the table as range-partitioned on "Date".
+
+        Returns:
+        - sql.Composed: The statement.
+        """
 
-    def insert_data(self, csv_data, table_name)-> None:
+        create_table_query = sql.SQL("CREATE TABLE {} ({})").format(
+            sql.Identifier(table_name),
+            sql.SQL(', ').join(
+                [sql.SQL("{} {}").format(sql.Identifier(col), sql.SQL(self.get_pg_datatype(csv_data.dtypes[col], col)))
+                 for col in csv_data.columns])
+        )
+        if partition_by_year:
+            if 'Date' not in csv_data.columns:
+                raise ValueError('A table partitioned by year needs a "Date" column')
+            create_table_query += sql.SQL(' PARTITION BY RANGE ("Date")')
+        return create_table_query + sql.SQL(';')
+
+    @staticmethod
+    def data_years(csv_data) -> list:
         """
-        Insert data into a PostgreSQL table.
+        Collect the meet years a chunk of data needs partitions for: every year from its earliest meet to the current
+        year, so rows in later chunks of the same load also have somewhere to go.
 
         Parameters:
-        - csv_data (pd.DataFrame): The DataFrame containing the data to be inserted.
-        - table_name (str): The name of the table.
+        - csv_data (pd.DataFrame): A chunk of the data to be inserted.
 
         Returns:
-        None
+        - list of int: The years.
         """
-        IGNORE_COLUMN_NAMES = ['Sanctioned']
-        if IGNORE_COLUMN_NAMES:
-            csv_data = csv_data.drop(columns=IGNORE_COLUMN_NAMES, errors='ignore')
 
+        if 'Date' not in csv_data.columns:
+            return []
+        years = pd.to_datetime(csv_data['Date'], errors='coerce').dt.year.dropna()
+        if years.empty:
+            return [date.today().year]
+        return list(range(int(years.min()), max(int(years.max()), date.today().year) + 1))
 
-        logging.basicConfig(filename='import_log.txt', level=logging.INFO,
-                            format='%(asctime)s - %(levelname)s - %(message)s')
+    @staticmethod
+    def is_partitioned(cur, table_name) -> bool:
+        """
+        Check whether a table is a partitioned table.
+        """
 
-        conn = psycopg2.connect(self.database_url)
-        cur = conn.cursor()
-        try:
-            conn.autocommit = False
-            # Insert data into the table
-            csv_data_string = StringIO()
-            csv_data.to_csv(csv_data_string, index=False, header=False)
-            csv_data_string.seek(0)
+        cur.execute("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table JOIN pg_class ON pg_class.oid = partrelid "
+                    "WHERE relname = %s AND relnamespace = current_schema()::regnamespace);", (table_name,))
+        return cur.fetchone()[0]
 
-            copy_query = f"COPY {table_name} FROM STDIN WITH CSV DELIMITER ','"
-            try:
-                cur.copy_expert(copy_query, csv_data_string)
-            except psycopg2.errors.BadCopyFileFormat as e:
-                logging.error(f"Error: {e}")
-                problematic_row = csv_data.iloc[cur.rowcount]
-                logging.error(f"Problematic row: {problematic_row}")
-                print("Problematic row:", problematic_row)
-                # Skip to the next row
-                csv_data_string.seek(0)  # Reset the StringIO position
-                next(csv_data_string)  # Skip the problematic row
-                # Retry the COPY command without the problematic row
-                cur.copy_expert(copy_query, csv_data_string)
-            conn.commit()
-        except psycopg2.Error as e:
-            # Log any other errors and raise the exception
-            logging.error(f"Error: {e}")
-            conn.rollback()
-            raise e
-        finally:
-            # Close the cursor and connection
-            cur.close()
-            conn.close()
+    @staticmethod
+    def get_partitions(cur, table_name) -> list:
+        """
+        List the names of a table's partitions.
+        """
 
+        cur.execute("SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = inhrelid "
+                    "JOIN pg_class parent ON parent.oid = inhparent WHERE parent.relname = %s;", (table_name,))
+        return [relname for (relname,) in cur.fetchall()]
 
-    def fetch_data(self, table_name):
+    def get_partition_years(self, cur, table_name):
         """
-        Fetch data from a PostgreSQL table.
+        Collect the meet years a table has a yearly partition for.
 
         Parameters:
+        - cur: An open cursor.
         - table_name (str): The name of the table.
 
         Returns:
-        - pd.DataFrame: The fetched data.
+        - set of int or None: The years, or None if the table isn't partitioned.
         """
 
-        conn = psycopg2.connect(self.database_url)
-        cur = conn.cursor()
+        if not self.is_partitioned(cur, table_name):
+            return None
+        suffixes = (partition_name[len(table_name) + 1:] for partition_name in self.get_partitions(cur, table_name))
+        return {int(year) for year in suffixes if year.isdigit()}
 
-        # Fetch data from the table
-        query = f"""SELECT "Name", "Sex", "Event", "Age", "BirthYearClass", "AgeClass", "Division", "BodyweightKg",
-         "WeightClassKg", "Best3SquatKg", "Best3BenchKg", "Best3DeadliftKg", "Wilks", "Place", "Tested", "Country", "Federation",
-         "Date", "MeetName", "MeetState" FROM {table_name} WHERE "Age" IS NOT NULL AND CAST(SUBSTRING("Date" FROM 1 FOR 4) AS INTEGER) > EXTRACT(YEAR FROM CURRENT_DATE) - 7 AND "Place" != 'DQ' AND "MeetCountry" = 'USA';"""
-        chunk_size = 1000  # Adjust as needed
-        result_chunks = pd.read_sql_query(query, conn, chunksize=chunk_size)
+    @staticmethod
+    def create_year_partitions(cur, table_name, years) -> list:
+        """
+        Create the yearly partitions that don't exist yet, plus a default partition that catches rows without a date.
+
+        Parameters:
+        - cur: An open cursor.
+        - table_name (str): The name of the partitioned table.
+        - years (iterable of int): The meet years that need a partition.
 
-        processed_chunks = []
-        for chunk in result_chunks:
-            # Apply custom functions to the chunk
-            remove_special_chars(chunk)
-            chunk = convert_kg_to_lbs(chunk)
-            chunk = apply_business_rules(chunk)
+        Returns:
+        - list of str: The partitions created.
+        """
 
-            # Append the processed chunk to the list
-            processed_chunks.append(chunk)
+        existing_partitions = set(PowerliftingDataHandler.get_partitions(cur, table_name))
 
-        # Concatenate the processed chunks into a single DataFrame
-        result = pd.concat(processed_chunks, ignore_index=True)
+        created_partitions = []
+        for year in sorted(set(years)):
+            partition_name = f"{table_name}_{year}"
+            if partition_name in existing_partitions:
+                continue
+            cur.execute(sql.SQL("CREATE TABLE {} PARTITION OF {} FOR VALUES FROM ({}) TO ({});").format(
+                sql.Identifier(partition_name), sql.Identifier(table_name),
+                sql.Literal(f"{year}-01-01"), sql.Literal(f"{year + 1}-01-01")))
+            created_partitions.append(partition_name)
 
-        conn.close()
-        return result
+        default_partition = f"{table_name}_default"
+        if default_partition not in existing_partitions:
+            cur.execute(sql.SQL("CREATE TABLE {} PARTITION OF {} DEFAULT;").format(
+                sql.Identifier(default_partition), sql.Identifier(table_name)))
+            created_partitions.append(default_partition)
 
-    def collect_max_dt(self, table_name) -> str:
+        if created_partitions:
+            print(f"Created partitions {', '.join(created_partitions)} of '{table_name}'")
+        return created_partitions
+
+    def add_year_partitions(self, cur, table_name, csv_data) -> list:
         """
-        Collect the maximum date from a PostgreSQL table.
+        Create any yearly partitions a load needs before its rows are copied, if the table is partitioned.
 
         Parameters:
+        - cur: An open cursor.
         - table_name (str): The name of the table.
+        - csv_data (pd.DataFrame): A chunk of the data to be inserted.
 
         Returns:
-        - str: The maximum date in string format.
+        - list of str: The partitions created.
         """
 
-        conn = psycopg2.connect(self.database_url)
-        cur = conn.cursor()
+        if not self.is_partitioned(cur, table_name):
+            return []
+        return self.create_year_partitions(cur, table_name, self.data_years(csv_data))
 
-        query = f"""SELECT MAX("Date") FROM {table_name};"""
-        cur.execute(query)
+    def new_partition_years(self, csv_data, partition_years) -> list:
+        """
+        Collect the meet years a chunk of a load needs a partition for that partition_years doesn't have yet, and add
+        them to it.
 
-        # Fetch the result
-        max_date_str = cur.fetchone()[0]
+        Parameters:
+        - csv_data (pd.DataFrame): A chunk of the data to be inserted.
+        - partition_years (set of int or None): The years with a partition, from prepare_load; None when the table
+          isn't partitioned.
 
-        cur.close
-        conn.close()
+        Returns:
+        - list of int: The years to create partitions for, oldest first.
+        """
 
-        return max_date_str
+        if partition_years is None:
+            return []
+        years = sorted(set(self.data_years(csv_data)) - partition_years)
+        partition_years.update(years)
+        return years
 
+    def add_chunk_partitions(self, cur, table_name, csv_data, partition_years) -> list:
+        """
+        Create the yearly partitions a chunk of a load needs before its rows are copied, when an earlier chunk
+        didn't already need them. Rows of a year without a partition would otherwise land in the default partition,
+        where retention never expires them and which blocks creating that year's partition later.
 
-    def collect_cnt_records(self, table_name) -> int:
+        Parameters:
+        - cur: An open cursor inside the load's transaction.
+        - table_name (str): The name of the table.
+        - csv_data (pd.DataFrame): The chunk about to be copied.
+        - partition_years (set of int or None): The years with a partition, from prepare_load; updated in place.
+
+        Returns:
+        - list of str: The partitions created.
+        """
+
+        years = self.new_partition_years(csv_data, partition_years)
+        return self.create_year_partitions(cur, table_name, years) if years else []
+
+    @staticmethod
+    def estimate_row_count(cur, table_name) -> int:
+        """
+        Look up a table's row count in the catalog instead of counting it: pg_class.reltuples as of its last ANALYZE,
+        or the live row count the statistics collector keeps when it has never been analyzed.
+        """
+
+        cur.execute("SELECT CASE WHEN reltuples >= 0 THEN reltuples::bigint ELSE COALESCE(n_live_tup, 0) END "
+                    "FROM pg_class LEFT JOIN pg_stat_user_tables ON relid = pg_class.oid "
+                    "WHERE pg_class.oid = quote_ident(%s)::regclass;", (table_name,))
+        return cur.fetchone()[0]
+
+    def drop_expired_partitions(self, table_name, keep_years=RETENTION_YEARS, detach_only=False) -> list:
+        """
+        Enforce the retention window on a year-partitioned table by detaching, and by default dropping, the partitions
+        of meet years older than keep_years. Each partition goes in a single catalog operation instead of a DELETE,
+        and nothing is scanned: dataset_state's row count is reduced by the partitions' row counts from the
+        planner statistics, which create_indexes refreshes after every load.
+
+        Parameters:
+        - table_name (str): The name of the partitioned table.
+        - keep_years (int): The number of meet years kept, including the current one.
+        - detach_only (bool): Keep the detached partitions as standalone tables instead of dropping them.
+
+        Returns:
+        - list of str: The partitions removed from the table.
+        """
+
+        with self.connection() as conn, conn.cursor() as cur:
+            try:
+                if not self.is_partitioned(cur, table_name):
+                    return []
+
+                oldest_kept_year = date.today().year - keep_years + 1
+                expired_partitions = []
+                for partition_name in self.get_partitions(cur, table_name):
+                    year = partition_name[len(table_name) + 1:]
+                    if year.isdigit() and int(year) < oldest_kept_year:
+                        expired_partitions.append(partition_name)
+
+                rows_removed = 0
+                for partition_name in sorted(expired_partitions):
+                    rows_removed += self.estimate_row_count(cur, partition_name)
+                    cur.execute(sql.SQL("ALTER TABLE {} DETACH PARTITION {};").format(
+                        sql.Identifier(table_name), sql.Identifier(partition_name)))
+                    if not detach_only:
+                        cur.execute(sql.SQL("DROP TABLE {};").format(sql.Identifier(partition_name)))
+                if rows_removed and self.get_dataset_state(cur, table_name) is not None:
+                    cur.execute('UPDATE dataset_state SET "RowCount" = "RowCount" - %s, "UpdatedAt" = now() '
+                                'WHERE "TableName" = %s;', (rows_removed, table_name))
+                conn.commit()
+
+                if expired_partitions:
+                    action = 'Detached' if detach_only else 'Dropped'
+                    print(f"{action} partitions {', '.join(sorted(expired_partitions))} of '{table_name}'")
+                return sorted(expired_partitions)
+            except psycopg2.Error as e:
+                logging.error(f"Error: {e}")
+                conn.rollback()
+                raise
+
+    def create_indexes(self, table_name, trigram=False) -> list:
         """
-        Collect the count of records from a PostgreSQL table.
+        Build the indexes in POWERLIFTING_INDEXES that don't exist yet and refresh the planner statistics.
+
+        Call this after a bulk load rather than before it, so COPY doesn't maintain every index row by row. On a
+        year-partitioned table the indexes cascade to every partition, including ones created later.
 
         Parameters:
         - table_name (str): The name of the table.
+        - trigram (bool): Also build a pg_trgm index on "Name" for substring searches; skipped with a message if the
+          extension can't be created.
 
         Returns:
-        - int: The count of records.
+        - list of str: The names of the table's planned indexes.
+        """
+
+        with self.connection() as conn, conn.cursor() as cur:
+            try:
+                index_names = []
+                for suffix, columns in POWERLIFTING_INDEXES:
+                    index_name = f"{table_name}_{suffix}_idx"
+                    cur.execute(sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {} ({});").format(
+                        sql.Identifier(index_name), sql.Identifier(table_name),
+                        sql.SQL(', ').join(sql.Identifier(col) for col in columns)))
+                    index_names.append(index_name)
+
+                if trigram:
+                    index_name = f"{table_name}_name_trgm_idx"
+                    cur.execute("SAVEPOINT trigram_index;")
+                    try:
+                        cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+                        cur.execute(sql.SQL('CREATE INDEX IF NOT EXISTS {} ON {} USING gin ("Name" gin_trgm_ops);').format(
+                            sql.Identifier(index_name), sql.Identifier(table_name)))
+                        cur.execute("RELEASE SAVEPOINT trigram_index;")
+                        index_names.append(index_name)
+                    except psycopg2.Error as e:
+                        cur.execute("ROLLBACK TO SAVEPOINT trigram_index;")
+                        print(f"Skipping the trigram index on '{table_name}': {str(e).splitlines()[0]}")
+
+                cur.execute(sql.SQL("ANALYZE {};").format(sql.Identifier(table_name)))
+                conn.commit()
+                return index_names
+            except psycopg2.Error as e:
+                logging.error(f"Error: {e}")
+                conn.rollback()
+                raise
+
+    def drop_indexes(self, table_name) -> None:
+        """
+        Drop the planned indexes ahead of a bulk load; create_indexes rebuilds them afterwards.
+
+        Parameters:
+        - table_name (str): The name of the table.
+
+        Returns:
+        None
         """
 
-        conn = psycopg2.connect(self.database_url)
-        cur = conn.cursor()
+        with self.connection() as conn, conn.cursor() as cur:
+            for suffix in [suffix for suffix, _ in POWERLIFTING_INDEXES] + ['name_trgm']:
+                cur.execute(sql.SQL("DROP INDEX IF EXISTS {};").format(sql.Identifier(f"{table_name}_{suffix}_idx")))
+            conn.commit()
+
+    def check_index_usage(self, table_name) -> dict:
+        """
+        EXPLAIN each query in APP_QUERY_SHAPES and report the indexes its plan uses.
 
-        query = f"""SELECT count(*) FROM {table_name};"""
-        cur.execute(query)
+        Sequential scans are disabled for the check, so a query is only reported without indexes if no index can
+        serve it at all, whatever the table's current size. On a year-partitioned table the plan scans each
+        partition's own copy of an index, which is reported under the name of the table's index it belongs to.
 
-        # Fetch the result
-        current_cnt = cur.fetchone()[0]
+        Parameters:
+        - table_name (str): The name of the table.
 
-        cur.close
-        conn.close()
+        Returns:
+        - dict: Query shape name to the list of index names in its plan.
+        """
+
+        def plan_index_names(plan):
+            index_names = [plan['Index Name']] if 'Index Name' in plan else []
+            for child in plan.get('Plans', []):
+                index_names.extend(plan_index_names(child))
+            return index_names
+
+        with self.connection() as conn, conn.cursor() as cur:
+            try:
+                cur.execute("SET LOCAL enable_seqscan = off;")
+                index_usage = {}
+                for name, (query, params) in APP_QUERY_SHAPES.items():
+                    cur.execute(sql.SQL("EXPLAIN (FORMAT JSON) " + query).format(sql.Identifier(table_name)), params)
+                    index_usage[name] = plan_index_names(cur.fetchone()[0][0]['Plan'])
+                    if not index_usage[name]:
+                        print(f"Query '{name}' on '{table_name}' can't use any index")
+
+                cur.execute("SELECT child.relname, parent.relname FROM pg_inherits JOIN pg_class child ON child.oid = "
+                            "inhrelid JOIN pg_class parent ON parent.oid = inhparent WHERE child.relkind = 'i' "
+                            "AND child.relname = ANY(%s);", (sorted(set(chain(*index_usage.values()))),))
+                parent_indexes = dict(cur.fetchall())
+                return {name: list(dict.fromkeys(parent_indexes.get(index_name, index_name) for index_name in names))
+                        for name, names in index_usage.items()}
+            finally:
+                conn.rollback()
+
+    @staticmethod
+    def get_table_columns(cur, table_name):
+        """
+        Collect the declared columns of a PostgreSQL table.
+
+        Parameters:
+        - cur: An open cursor.
+        - table_name (str): The name of the table.
+
+        Returns:
+        - list of tuple: (column_name, data_type) pairs in table order.
+        """
+
+        cur.execute(
+            "SELECT column_name, data_type FROM information_schema.columns "
+            "WHERE table_name = %s AND table_schema = current_schema() ORDER BY ordinal_position;",
+            (table_name,))
+        return cur.fetchall()
+
+    @staticmethod
+    def create_enum_types(cur) -> None:
+        """
+        Create the enum types in POWERLIFTING_ENUM_TYPES that don't exist yet.
+
+        Parameters:
+        - cur: An open cursor.
+
+        Returns:
+        None
+        """
+
+        for type_name, labels in POWERLIFTING_ENUM_TYPES.values():
+            cur.execute("SELECT EXISTS (SELECT 1 FROM pg_type WHERE typname = %s "
+                        "AND typnamespace = current_schema()::regnamespace);", (type_name,))
+            if not cur.fetchone()[0]:
+                cur.execute(sql.SQL("CREATE TYPE {} AS ENUM ({});").format(
+                    sql.Identifier(type_name), sql.SQL(', ').join(sql.Literal(label) for label in labels)))
+
+    @staticmethod
+    def add_enum_labels(cur, type_name, values) -> int:
+        """
+        Add values an enum type doesn't allow yet as new labels.
+
+        New labels can't be used by the transaction that added them, so commit before loading rows that use them.
+
+        Parameters:
+        - cur: An open cursor.
+        - type_name (str): The name of the enum type.
+        - values (iterable of str): The values that need to be allowed.
+
+        Returns:
+        - int: The number of labels added.
+        """
+
+        cur.execute("SELECT enumlabel FROM pg_enum JOIN pg_type ON pg_type.oid = pg_enum.enumtypid "
+                    "WHERE pg_type.typname = %s;", (type_name,))
+        labels = {label for (label,) in cur.fetchall()}
+        added = 0
+        for value in values:
+            # Empty strings are loaded as NULL, so they never need a label
+            if value and value not in labels:
+                print(f"Adding '{value}' to enum type '{type_name}'")
+                cur.execute(sql.SQL("ALTER TYPE {} ADD VALUE IF NOT EXISTS {};").format(
+                    sql.Identifier(type_name), sql.Literal(value)))
+                labels.add(value)
+                added += 1
+        return added
+
+    def sync_enum_labels(self, cur, table_name, csv_data) -> int:
+        """
+        Make sure the table's enum columns allow every value in the data, so upstream additions such as a new
+        equipment category are absorbed instead of rejected.
+
+        Parameters:
+        - cur: An open cursor.
+        - table_name (str): The name of the table.
+        - csv_data (pd.DataFrame): A chunk of the data to be inserted.
+
+        Returns:
+        - int: The number of labels added.
+        """
+
+        cur.execute("SELECT column_name, udt_name FROM information_schema.columns WHERE table_name = %s "
+                    "AND table_schema = current_schema() AND data_type = 'USER-DEFINED';", (table_name,))
+        added = 0
+        for column_name, type_name in cur.fetchall():
+            if column_name in csv_data.columns:
+                values = pd.unique(csv_data[column_name].dropna().astype(str))
+                added += self.add_enum_labels(cur, type_name, values)
+        return added
+
+    @staticmethod
+    def get_enum_labels(cur, table_name) -> dict:
+        """
+        Collect the labels each of a table's enum columns allows.
+
+        Parameters:
+        - cur: An open cursor.
+        - table_name (str): The name of the table.
+
+        Returns:
+        - dict: Column name to (enum type name, set of labels).
+        """
+
+        cur.execute("SELECT columns.column_name, pg_type.typname, pg_enum.enumlabel FROM information_schema.columns "
+                    "JOIN pg_type ON pg_type.typname = columns.udt_name JOIN pg_enum ON pg_enum.enumtypid = pg_type.oid "
+                    "WHERE columns.table_name = %s AND columns.table_schema = current_schema() "
+                    "AND columns.data_type = 'USER-DEFINED';", (table_name,))
+        enum_labels = {}
+        for column_name, type_name, label in cur.fetchall():
+            enum_labels.setdefault(column_name, (type_name, set()))[1].add(label)
+        return enum_labels
+
+    def migrate_column_types(self, table_name) -> list:
+        """
+        Convert an existing table's columns to their declared types in POWERLIFTING_COLUMN_TYPES, e.g. the text
+        "Date" column of a table created before the schema was declared.
+
+        Enum labels for the values already in the table are committed first. All columns are then converted by a
+        single ALTER TABLE, so the table is rewritten once. The rewrite holds an exclusive lock on the table.
+
+        Parameters:
+        - table_name (str): The name of the table.
+
+        Returns:
+        - list of str: The columns that were converted.
+        """
+
+        with self.connection() as conn, conn.cursor() as cur:
+            try:
+                self.create_enum_types(cur)
+                current_types = dict(self.get_table_columns(cur, table_name))
+                for col, (type_name, _) in POWERLIFTING_ENUM_TYPES.items():
+                    if current_types.get(col) not in (None, 'USER-DEFINED'):
+                        cur.execute(sql.SQL("SELECT DISTINCT {}::text FROM {};").format(
+                            sql.Identifier(col), sql.Identifier(table_name)))
+                        self.add_enum_labels(cur, type_name, [value for (value,) in cur.fetchall()])
+                conn.commit()
+
+                converted_columns = []
+                alter_clauses = []
+                for col, declared_type in POWERLIFTING_COLUMN_TYPES.items():
+                    current_type = current_types.get(col)
+                    if current_type is None or current_type == PG_INFORMATION_SCHEMA_TYPES.get(declared_type,
+                                                                                                'USER-DEFINED'):
+                        continue
+                    converted_columns.append(col)
+                    alter_clauses.append(sql.SQL("ALTER COLUMN {col} TYPE {type} USING NULLIF({col}::text, '')::{type}")
+                                         .format(col=sql.Identifier(col), type=sql.SQL(declared_type)))
+
+                if alter_clauses:
+                    print(f"Converting {', '.join(converted_columns)} in '{table_name}' to their declared types")
+                    cur.execute(sql.SQL("ALTER TABLE {} {};").format(sql.Identifier(table_name),
+                                                                     sql.SQL(', ').join(alter_clauses)))
+                    conn.commit()
+                return converted_columns
+            except psycopg2.Error as e:
+                logging.error(f"Error: {e}")
+                conn.rollback()
+                raise
+
+    def add_missing_columns(self, cur, table_name, csv_data) -> list:
+        """
+        Add any columns the data has but the table lacks, so upstream schema drift is absorbed by an incremental
+        load instead of a drop-and-recreate.
+
+        Parameters:
+        - cur: An open cursor inside the load's transaction.
+        - table_name (str): The name of the table.
+        - csv_data (pd.DataFrame): A chunk of the data to be inserted.
+
+        Returns:
+        - list of str: The data's columns, in the order they are COPYed.
+        """
+
+        copy_columns = [col for col in csv_data.columns if col not in IGNORE_COLUMN_NAMES]
+        existing_columns = {column_name for column_name, _ in self.get_table_columns(cur, table_name)}
+        if any(col not in existing_columns for col in copy_columns if col in POWERLIFTING_ENUM_TYPES):
+            self.create_enum_types(cur)
+        for col in copy_columns:
+            if col not in existing_columns:
+                add_column_query = sql.SQL("ALTER TABLE {} ADD COLUMN {} {};").format(
+                    sql.Identifier(table_name), sql.Identifier(col), sql.SQL(self.get_pg_datatype(csv_data.dtypes[col], col)))
+                print(f"Adding new column '{col}' to '{table_name}'")
+                cur.execute(add_column_query)
+        return copy_columns
+
+    @staticmethod
+    def build_csv_copy_query(table_name, copy_columns):
+        """
+        Build a CSV COPY statement with an explicit column list.
+        """
+
+        return sql.SQL("COPY {} ({}) FROM STDIN WITH CSV DELIMITER ','").format(
+            sql.Identifier(table_name), sql.SQL(', ').join(sql.Identifier(col) for col in copy_columns))
+
+    def prepare_load(self, cur, table_name, first_chunk, upsert) -> tuple:
+        """
+        Set a table up for a load from its first non-empty chunk, before any rows are copied. insert_data and
+        load_pipelined both start here.
+
+        New enum labels must be committed before COPY can use them, and the partitions the first chunk needs are
+        committed up front so the parent table isn't locked for the whole load. Years that only show up in later
+        chunks get their partitions from add_chunk_partitions as the load reaches them, inside its transaction. New
+        columns are then added inside the load's transaction and, when upserting, a staging table is created for the
+        rows to be copied into.
+
+        Parameters:
+        - cur: An open cursor on the load's connection.
+        - table_name (str): The name of the table.
+        - first_chunk (pd.DataFrame): The first non-empty chunk of the load, from peek_chunks.
+        - upsert (bool): COPY into a staging table that finish_load merges on NATURAL_KEY.
+
+        Returns:
+        - tuple: (the columns to COPY, in order; the table to COPY into; the years with a partition, or None if the
+          table isn't partitioned).
+        """
+
+        self.sync_enum_labels(cur, table_name, first_chunk)
+        self.add_year_partitions(cur, table_name, first_chunk)
+        cur.connection.commit()
+        partition_years = self.get_partition_years(cur, table_name)
+        copy_columns = self.add_missing_columns(cur, table_name, first_chunk)
+        copy_table = self.create_staging_table(cur, table_name) if upsert else table_name
+        return copy_columns, copy_table, partition_years
+
+    def finish_load(self, cur, table_name, copy_table, copy_columns, rows_loaded, rows_rejected, started_at,
+                    load_start, upstream_updated=None, archive_sha256=None) -> int:
+        """
+        Merge the staged rows of an upsert into the table, then record the load, inside the load's transaction.
+
+        Parameters:
+        - cur: An open cursor inside the load's transaction.
+        - table_name (str): The name of the table.
+        - copy_table (str): The table the rows were copied into, from prepare_load.
+        - copy_columns (list of str): The columns copied, from prepare_load.
+        - rows_loaded (int): The number of rows copied.
+        - rows_rejected (int): The number of rows quarantined.
+        - started_at (datetime): When the load started.
+        - load_start (float): time.perf_counter() when the load started.
+        - upstream_updated (date): OpenPowerlifting's last updated date.
+        - archive_sha256 (str): The hash of the archive the data came from.
+
+        Returns:
+        - int: The number of rows loaded, counting only new rows when upserting.
+        """
+
+        rows_updated = 0
+        if copy_table != table_name:
+            rows_loaded, rows_updated = self.merge_staging_table(cur, table_name, copy_table, copy_columns)
+        self.record_load(cur, table_name, rows_loaded, rows_rejected, started_at, time.perf_counter() - load_start,
+                         upstream_updated, archive_sha256, rows_updated)
+        return rows_loaded
+
+    def insert_data(self, csv_data, table_name, batch_size=10000, copy_format='csv', quarantine=True,
+                    max_rejects=1000, upstream_updated=None, archive_sha256=None, upsert=False)-> None:
+        """
+        Insert data into a PostgreSQL table.
+
+        Rows are rendered to CSV lazily, batch_size at a time, and streamed into COPY, so memory stays flat
+        regardless of how many rows are inserted. With copy_format='binary' the rows are instead encoded as PGCOPY
+        tuples that follow the table's declared column types, which skips float formatting and parsing.
+
+        With quarantine enabled each batch is copied under a savepoint. A batch that fails is split in halves until
+        the malformed rows are isolated; those rows go to the {table_name}_rejects table with the error text and the
+        rest of the load carries on, so k bad rows cost O(k log n) extra COPYs.
+
+        Parameters:
+        - csv_data (pd.DataFrame or iterable of pd.DataFrame): The data to be inserted, whole or in chunks.
+        - table_name (str): The name of the table.
+        - batch_size (int): The number of rows rendered to CSV at a time.
+        - copy_format (str): 'csv' or 'binary'.
+        - quarantine (bool): Isolate malformed rows instead of failing the whole load.
+        - max_rejects (int): Abort the load once more rows than this have been rejected.
+        - upstream_updated (date): OpenPowerlifting's last updated date, recorded with the load.
+        - archive_sha256 (str): The hash of the archive the data came from, recorded with the load.
+        - upsert (bool): COPY into a staging table and merge it on NATURAL_KEY, so rows already in the table are
+          updated instead of duplicated.
+
+        New columns in the data are added to the table first and COPY names its columns explicitly. Values in the
+        first non-empty chunk that the table's enum columns don't allow yet are added as enum labels; unknown values
+        in later chunks fail their rows, which quarantine moves to the rejects table. Without quarantine each chunk
+        is one COPY. On a year-partitioned table each chunk's missing yearly partitions are created before its rows
+        are copied. The load is recorded in
+        dataset_state and etl_runs in the same transaction as the rows themselves.
+
+        Returns:
+        None
+        """
+        first_chunk, chunks = peek_chunks([csv_data] if isinstance(csv_data, pd.DataFrame) else csv_data)
+        if first_chunk is None:
+            return
+
+        logging.basicConfig(filename='import_log.txt', level=logging.INFO,
+                            format='%(asctime)s - %(levelname)s - %(message)s')
+
+        started_at = datetime.now(timezone.utc)
+        load_start = time.perf_counter()
+        with self.connection() as conn, conn.cursor() as cur:
+            try:
+                conn.autocommit = False
+                copy_columns, copy_table, partition_years = self.prepare_load(cur, table_name, first_chunk, upsert)
+                # Insert data into the table, or into its staging table when upserting
+                if copy_format == 'binary':
+                    table_columns = self.get_table_columns(cur, copy_table)
+                    copy_query = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT binary)").format(
+                        sql.Identifier(copy_table),
+                        sql.SQL(', ').join(sql.Identifier(column_name) for column_name, _ in table_columns))
+                    # Quarantined batches are encoded before their COPY starts, so bad values are isolated like
+                    # the CSV path's DataErrors
+                    make_reader = lambda frames: BinaryCopyReader(frames, table_columns, batch_size=batch_size,
+                                                                  eager=quarantine)
+                else:
+                    copy_query = self.build_csv_copy_query(copy_table, copy_columns)
+                    make_reader = lambda frames: DataFrameCsvReader(frames, batch_size=batch_size, columns=copy_columns)
+
+                if quarantine:
+                    reject_table = f"{table_name}_rejects"
+                    self.create_rejects_table(cur, reject_table)
+                    rejected = 0
+                    rows_loaded = 0
+                    for batch in iter_row_batches(chunks, batch_size):
+                        self.add_chunk_partitions(cur, table_name, batch, partition_years)
+                        batch_rejected = self.copy_with_quarantine(cur, copy_query, make_reader, batch, table_name,
+                                                                   reject_table, max_rejects - rejected)
+                        rejected += batch_rejected
+                        rows_loaded += len(batch) - batch_rejected
+                    if rejected:
+                        print(f"{rejected} malformed rows were moved to {reject_table}")
+                else:
+                    rows_loaded, rejected = 0, 0
+                    for chunk in chunks:
+                        if chunk.empty:
+                            continue
+                        self.add_chunk_partitions(cur, table_name, chunk, partition_years)
+                        cur.copy_expert(copy_query, make_reader([chunk]))
+                        rows_loaded += cur.rowcount
+                self.finish_load(cur, table_name, copy_table, copy_columns, rows_loaded, rejected, started_at,
+                                 load_start, upstream_updated, archive_sha256)
+                conn.commit()
+            except psycopg2.Error as e:
+                # Log any other errors and raise the exception
+                logging.error(f"Error: {e}")
+                conn.rollback()
+                raise e
+            except ValueError:
+                conn.rollback()
+                raise
+
+    @staticmethod
+    def create_staging_table(cur, table_name) -> str:
+        """
+        Create an empty unlogged staging table with the same columns and types as the target table.
+
+        It is recreated for every load, so it always matches the target's current columns, and it is dropped again
+        by merge_staging_table inside the same transaction.
+
+        Parameters:
+        - cur: An open cursor inside the load's transaction.
+        - table_name (str): The name of the target table.
+
+        Returns:
+        - str: The name of the staging table.
+        """
+
+        staging_table = f"{table_name}_staging"
+        cur.execute(sql.SQL("DROP TABLE IF EXISTS {};").format(sql.Identifier(staging_table)))
+        cur.execute(sql.SQL("CREATE UNLOGGED TABLE {} (LIKE {} INCLUDING DEFAULTS);").format(
+            sql.Identifier(staging_table), sql.Identifier(table_name)))
+        return staging_table
+
+    @staticmethod
+    def merge_staging_table(cur, table_name, staging_table, columns) -> tuple:
+        """
+        Upsert the staged rows into the target table on NATURAL_KEY, then drop the staging table.
+
+        Staged rows that repeat a key are collapsed to the last one copied. Matching rows in the target are updated
+        where any column differs and the remaining staged rows are inserted. Key columns match NULL to NULL, as
+        OpenPowerlifting leaves e.g. Division empty for some federations.
+
+        Parameters:
+        - cur: An open cursor inside the load's transaction.
+        - table_name (str): The name of the target table.
+        - staging_table (str): The name of the staging table.
+        - columns (list of str): The loaded columns; columns outside this list are left as they are.
+
+        Returns:
+        - tuple: (rows inserted, rows updated).
+        """
+
+        def key_matches(left, right):
+            # Name and Date are always present, and plain equality on them lets the planner hash join
+            return sql.SQL(' AND ').join(
+                sql.SQL("{left}.{col} = {right}.{col}" if col in ('Name', 'Date')
+                        else "{left}.{col} IS NOT DISTINCT FROM {right}.{col}").format(
+                    left=sql.Identifier(left), right=sql.Identifier(right), col=sql.Identifier(col))
+                for col in NATURAL_KEY)
+
+        def column_list(alias, names):
+            return sql.SQL(', ').join(sql.SQL("{}.{}").format(sql.Identifier(alias), sql.Identifier(col))
+                                      for col in names)
+
+        staging = sql.Identifier(staging_table)
+        target = sql.Identifier(table_name)
+        value_columns = [col for col in columns if col not in NATURAL_KEY]
+
+        cur.execute(sql.SQL("ANALYZE {};").format(staging))
+        cur.execute(sql.SQL("DELETE FROM {staging} AS s USING {staging} AS later WHERE {key} AND s.ctid < later.ctid;")
+                    .format(staging=staging, key=key_matches('s', 'later')))
+
+        rows_updated = 0
+        if value_columns:
+            cur.execute(sql.SQL("UPDATE {target} AS t SET {assignments} FROM {staging} AS s WHERE {key} "
+                                "AND ({t_values}) IS DISTINCT FROM ({s_values});").format(
+                target=target, staging=staging, key=key_matches('t', 's'),
+                assignments=sql.SQL(', ').join(sql.SQL("{col} = s.{col}").format(col=sql.Identifier(col))
+                                               for col in value_columns),
+                t_values=column_list('t', value_columns), s_values=column_list('s', value_columns)))
+            rows_updated = cur.rowcount
+
+        cur.execute(sql.SQL("INSERT INTO {target} ({columns}) SELECT {s_columns} FROM {staging} AS s "
+                            "WHERE NOT EXISTS (SELECT 1 FROM {target} AS t WHERE {key});").format(
+            target=target, staging=staging, key=key_matches('t', 's'),
+            columns=sql.SQL(', ').join(sql.Identifier(col) for col in columns), s_columns=column_list('s', columns)))
+        rows_inserted = cur.rowcount
+
+        cur.execute(sql.SQL("DROP TABLE {};").format(staging))
+        return rows_inserted, rows_updated
+
+    @staticmethod
+    def create_rejects_table(cur, reject_table) -> None:
+        """
+        Create the table that quarantined rows are written to, if it doesn't exist yet.
+
+        Parameters:
+        - cur: An open cursor.
+        - reject_table (str): The name of the rejects table.
+
+        Returns:
+        None
+        """
+
+        cur.execute(sql.SQL("""CREATE TABLE IF NOT EXISTS {} (
+            "RejectedAt" TIMESTAMPTZ NOT NULL DEFAULT now(),
+            "TableName" TEXT NOT NULL,
+            "Error" TEXT,
+            "RowData" TEXT
+        );""").format(sql.Identifier(reject_table)))
+
+    def copy_with_quarantine(self, cur, copy_query, make_reader, batch, table_name, reject_table,
+                             max_rejects) -> int:
+        """
+        COPY one batch under a savepoint, bisecting it on failure until the bad rows are isolated.
+
+        Parameters:
+        - cur: An open cursor inside the load's transaction.
+        - copy_query: The COPY statement.
+        - make_reader (callable): Builds a copy_expert reader from a list of frames.
+        - batch (pd.DataFrame): The rows to copy.
+        - table_name (str): The name of the target table.
+        - reject_table (str): The name of the rejects table.
+        - max_rejects (int): How many more rows may be rejected before the load is aborted.
+
+        Returns:
+        - int: The number of rows rejected.
+        """
+
+        rejected = 0
+        pending = [batch]
+        while pending:
+            rows = pending.pop()
+            cur.execute("SAVEPOINT copy_batch;")
+            try:
+                cur.copy_expert(copy_query, make_reader([rows]))
+                cur.execute("RELEASE SAVEPOINT copy_batch;")
+                continue
+            except (psycopg2.DataError, psycopg2.IntegrityError, BinaryEncodingError) as e:
+                cur.execute("ROLLBACK TO SAVEPOINT copy_batch;")
+                error = e
+
+            if len(rows) > 1:
+                # Retry each half, first half first so good rows keep their source order
+                middle = len(rows) // 2
+                pending.append(rows.iloc[middle:])
+                pending.append(rows.iloc[:middle])
+                continue
+
+            rejected += 1
+            if rejected > max_rejects:
+                raise ValueError(f"More than the allowed number of malformed rows for {table_name}, aborting load. "
+                                 f"Last error: {error}")
+            self.record_rejects(cur, table_name, reject_table, rows, [str(error)])
+
+        return rejected
+
+    @staticmethod
+    def record_rejects(cur, table_name, reject_table, rows, errors) -> None:
+        """
+        Write rejected rows to the rejects table as CSV lines, with the error for each, and log them.
+
+        Parameters:
+        - cur: An open cursor inside the load's transaction.
+        - table_name (str): The name of the target table.
+        - reject_table (str): The name of the rejects table.
+        - rows (pd.DataFrame): The rejected rows.
+        - errors (list of str): The error for each row.
+
+        Returns:
+        None
+        """
+
+        rows = rows.drop(columns=IGNORE_COLUMN_NAMES, errors='ignore')
+        for position, error in enumerate(errors):
+            row_data = rows.iloc[[position]].to_csv(index=False, header=False).strip()
+            logging.error(f"Error: {error}")
+            logging.error(f"Problematic row: {row_data}")
+            cur.execute(sql.SQL('INSERT INTO {} ("TableName", "Error", "RowData") VALUES (%s, %s, %s);').format(
+                sql.Identifier(reject_table)), (table_name, error.strip(), row_data))
+
+    @staticmethod
+    def create_metadata_tables(cur) -> None:
+        """
+        Create the load metadata tables if they don't exist yet: dataset_state keeps one row per table with its
+        current max date and row count, and etl_runs keeps a row per load.
+
+        Parameters:
+        - cur: An open cursor.
+
+        Returns:
+        None
+        """
+
+        cur.execute("""CREATE TABLE IF NOT EXISTS dataset_state (
+            "TableName" TEXT PRIMARY KEY,
+            "MaxDate" DATE,
+            "RowCount" BIGINT NOT NULL,
+            "UpstreamUpdated" DATE,
+            "ArchiveSha256" TEXT,
+            "UpdatedAt" TIMESTAMPTZ NOT NULL DEFAULT now()
+        );""")
+        cur.execute("""CREATE TABLE IF NOT EXISTS etl_runs (
+            "RunId" BIGSERIAL PRIMARY KEY,
+            "TableName" TEXT NOT NULL,
+            "StartedAt" TIMESTAMPTZ NOT NULL,
+            "FinishedAt" TIMESTAMPTZ NOT NULL DEFAULT now(),
+            "DurationSeconds" REAL,
+            "RowsLoaded" BIGINT NOT NULL,
+            "RowsRejected" BIGINT NOT NULL,
+            "MaxDate" DATE,
+            "RowCount" BIGINT NOT NULL,
+            "UpstreamUpdated" DATE,
+            "ArchiveSha256" TEXT
+        );""")
+        cur.execute('ALTER TABLE etl_runs ADD COLUMN IF NOT EXISTS "RowsUpdated" BIGINT NOT NULL DEFAULT 0;')
+
+    def record_load(self, cur, table_name, rows_loaded, rows_rejected, started_at, duration, upstream_updated=None,
+                    archive_sha256=None, rows_updated=0) -> None:
+        """
+        Record a load in dataset_state and etl_runs, inside the load's own transaction so the metadata can't drift
+        from the data.
+
+        The row count is carried forward from the previous state; the table is only counted the first time it is
+        recorded. The max date is read back with MAX("Date"), which the date index answers without a scan.
+
+        Parameters:
+        - cur: An open cursor inside the load's transaction.
+        - table_name (str): The name of the table loaded.
+        - rows_loaded (int): The number of rows inserted.
+        - rows_rejected (int): The number of rows quarantined.
+        - started_at (datetime): When the load started.
+        - duration (float): How long the load took, in seconds.
+        - upstream_updated (date): OpenPowerlifting's last updated date.
+        - archive_sha256 (str): The hash of the archive the data came from.
+        - rows_updated (int): The number of existing rows an upsert changed.
+
+        Returns:
+        None
+        """
+
+        self.create_metadata_tables(cur)
+        cur.execute('SELECT "RowCount" FROM dataset_state WHERE "TableName" = %s FOR UPDATE;', (table_name,))
+        state = cur.fetchone()
+        if state is None:
+            cur.execute(sql.SQL("SELECT count(*) FROM {};").format(sql.Identifier(table_name)))
+            row_count = cur.fetchone()[0]
+        else:
+            row_count = state[0] + rows_loaded
+        cur.execute(sql.SQL('SELECT MAX("Date") FROM {};').format(sql.Identifier(table_name)))
+        max_date = cur.fetchone()[0]
+
+        cur.execute("""INSERT INTO dataset_state ("TableName", "MaxDate", "RowCount", "UpstreamUpdated", "ArchiveSha256")
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT ("TableName") DO UPDATE SET "MaxDate" = EXCLUDED."MaxDate", "RowCount" = EXCLUDED."RowCount",
+                "UpstreamUpdated" = COALESCE(EXCLUDED."UpstreamUpdated", dataset_state."UpstreamUpdated"),
+                "ArchiveSha256" = COALESCE(EXCLUDED."ArchiveSha256", dataset_state."ArchiveSha256"),
+                "UpdatedAt" = now();""", (table_name, max_date, row_count, upstream_updated, archive_sha256))
+        cur.execute("""INSERT INTO etl_runs ("TableName", "StartedAt", "DurationSeconds", "RowsLoaded", "RowsUpdated",
+            "RowsRejected", "MaxDate", "RowCount", "UpstreamUpdated", "ArchiveSha256")
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s);""",
+                    (table_name, started_at, duration, rows_loaded, rows_updated, rows_rejected, max_date, row_count,
+                     upstream_updated, archive_sha256))
+
+    @staticmethod
+    def get_dataset_state(cur, table_name):
+        """
+        Look up a table's recorded state.
+
+        Parameters:
+        - cur: An open cursor.
+        - table_name (str): The name of the table.
+
+        Returns:
+        - tuple or None: ("MaxDate", "RowCount"), or None if no load has been recorded for the table.
+        """
+
+        cur.execute("SELECT to_regclass('dataset_state') IS NOT NULL;")
+        if not cur.fetchone()[0]:
+            return None
+        cur.execute('SELECT "MaxDate", "RowCount" FROM dataset_state WHERE "TableName" = %s;', (table_name,))
+        return cur.fetchone()
+
+
+    def load_pipelined(self, chunks, table_name, queue_depth=4, upstream_updated=None, archive_sha256=None,
+                       upsert=False, max_rejects=1000) -> int:
+        """
+        Load an iterator of DataFrame chunks into a PostgreSQL table with overlapping stages.
+
+        A parse thread pulls chunks from the iterator, a render thread turns them into CSV text and this thread
+        streams that text into COPY over a dedicated connection. The stages are joined by bounded queues,
+        so memory stays bounded by queue_depth chunks per queue and the load runs at the pace of the slowest stage.
+        The whole load is one transaction, which also records it in dataset_state and etl_runs.
+
+        Enum labels and yearly partitions are set up from the first non-empty chunk before the COPY starts. A later
+        chunk with meet years the table has no partition for ends the COPY; the partitions are created and a new COPY
+        carries on from that chunk. There is no bisecting quarantine here, so the render stage checks every later
+        chunk against the enum labels instead and holds back rows with a value the enum types don't allow; they are
+        written to the {table_name}_rejects table once the COPY is done, rather than failing it.
+
+        Parameters:
+        - chunks (iterable of pd.DataFrame): The chunks to be inserted, e.g. from stream_subset_from_csv.
+        - table_name (str): The name of the table.
+        - queue_depth (int): The maximum number of chunks waiting between two stages.
+        - upstream_updated (date): OpenPowerlifting's last updated date, recorded with the load.
+        - archive_sha256 (str): The hash of the archive the data came from, recorded with the load.
+        - upsert (bool): COPY into a staging table and merge it on NATURAL_KEY, as in insert_data.
+        - max_rejects (int): Abort the load once more rows than this have been rejected.
+
+        Returns:
+        - int: The number of rows loaded, counting only new rows when upserting.
+        """
+
+        started_at = datetime.now(timezone.utc)
+        load_start = time.perf_counter()
+
+        # Peek at the first rows so new upstream columns, enum labels and partitions are added before the COPY starts
+        first_chunk, chunks = peek_chunks(chunks)
+        if first_chunk is None:
+            return 0
+
+        with self.connection() as conn, conn.cursor() as cur:
+            try:
+                copy_columns, copy_table, partition_years = self.prepare_load(cur, table_name, first_chunk, upsert)
+                enum_labels = self.get_enum_labels(cur, table_name)
+                reject_table = f"{table_name}_rejects"
+                self.create_rejects_table(cur, reject_table)
+            except psycopg2.Error:
+                conn.rollback()
+                raise
+
+            parsed_queue = queue.Queue(maxsize=queue_depth)
+            rendered_queue = queue.Queue(maxsize=queue_depth)
+            stop_event = threading.Event()
+            rows_loaded = [0]
+            # (rows, errors) held back by the render stage, written to the rejects table after the COPY
+            rejects = []
+
+            def parse_stage():
+                try:
+                    for chunk in chunks:
+                        if not put_until_stopped(parsed_queue, chunk, stop_event):
+                            return
+                    put_until_stopped(parsed_queue, END_OF_STREAM, stop_event)
+                except Exception as e:
+                    put_until_stopped(parsed_queue, PipelineError(e), stop_event)
+
+            def render_stage():
+                while True:
+                    item = get_until_stopped(parsed_queue, stop_event)
+                    if item is END_OF_STREAM or isinstance(item, PipelineError):
+                        put_until_stopped(rendered_queue, item, stop_event)
+                        return
+                    try:
+                        errors = find_unknown_enum_values(item, enum_labels)
+                        unknown = ~pd.isna(errors)
+                        if unknown.any():
+                            rejects.append((item[unknown], list(errors[unknown])))
+                            rejected = sum(len(rows) for rows, _ in rejects)
+                            if rejected > max_rejects:
+                                raise ValueError(f"More than {max_rejects} rows for {table_name} hold values its enum "
+                                                 f"types don't allow, aborting load. Last error: {errors[unknown][-1]}")
+                            item = item[~unknown]
+                        years = self.new_partition_years(item, partition_years)
+                        if years and not put_until_stopped(rendered_queue, PartitionsNeeded(years), stop_event):
+                            return
+                        chunk = item.reindex(columns=copy_columns)
+                        rows_loaded[0] += chunk.shape[0]
+                        csv_text = chunk.to_csv(index=False, header=False)
+                    except Exception as e:
+                        put_until_stopped(rendered_queue, PipelineError(e), stop_event)
+                        return
+                    if not put_until_stopped(rendered_queue, csv_text, stop_event):
+                        return
+
+            stages = [threading.Thread(target=parse_stage, daemon=True), threading.Thread(target=render_stage, daemon=True)]
+            for stage in stages:
+                stage.start()
+
+            copy_query = self.build_csv_copy_query(copy_table, copy_columns)
+            reader = QueueReader(rendered_queue)
+            try:
+                cur.copy_expert(copy_query, reader)
+                # A chunk of meet years without a partition ends the COPY; once they are created the next COPY picks
+                # up the queue where this one stopped
+                while reader.partition_years:
+                    self.create_year_partitions(cur, table_name, reader.partition_years)
+                    reader = QueueReader(rendered_queue)
+                    cur.copy_expert(copy_query, reader)
+                rows_rejected = 0
+                for rows, errors in rejects:
+                    self.record_rejects(cur, table_name, reject_table, rows, errors)
+                    rows_rejected += len(rows)
+                if rows_rejected:
+                    print(f"{rows_rejected} rows with unknown enum values were moved to {reject_table}")
+                rows_loaded[0] = self.finish_load(cur, table_name, copy_table, copy_columns, rows_loaded[0],
+                                                  rows_rejected, started_at, load_start, upstream_updated,
+                                                  archive_sha256)
+                conn.commit()
+            except Exception as e:
+                logging.error(f"Error: {e}")
+                conn.rollback()
+                # Surface the error from the failing stage rather than the COPY it cancelled
+                if reader.error is not None:
+                    raise reader.error from e
+                raise
+            finally:
+                # Unblock any stage still waiting on a full queue
+                stop_event.set()
+
+        for stage in stages:
+            stage.join()
+        return rows_loaded[0]
+
+    def copy_query_to_frame(self, query, spool_size=256 * 1024 ** 2):
+        """
+        Run a SELECT as COPY (...) TO STDOUT on a pooled connection and parse the rows into typed columns.
+
+        Parameters:
+        - query (sql.Composed): A SELECT of FETCH_COLUMNS.
+        - spool_size (int): Bytes of CSV kept in memory before the spool file moves to disk.
+
+        Returns:
+        - pd.DataFrame: The rows, uncleaned.
+        """
+
+        copy_query = sql.SQL("COPY ({}) TO STDOUT WITH (FORMAT csv, HEADER true)").format(query)
+        with tempfile.SpooledTemporaryFile(max_size=spool_size, mode='w+b') as spool:
+            with self.connection() as conn, conn.cursor() as cur:
+                cur.copy_expert(copy_query, spool)
+            spool.seek(0)
+            # Only empty fields are NULL; text such as a state code of 'NA' stays as it is
+            return pd.read_csv(spool, dtype=FETCH_DTYPES, parse_dates=['Date'], keep_default_na=False,
+                               na_values=[''])
+
+    def fetch_data(self, table_name, workers=1, spool_size=256 * 1024 ** 2, use_clean_view=True):
+        """
+        Fetch data from a PostgreSQL table.
+
+        The projected rows are streamed out with COPY (SELECT ...) TO STDOUT into a spool file (memory up to
+        spool_size bytes, disk beyond), parsed into typed columns by read_csv and cleaned once as whole columns,
+        rather than fetched as Python objects and cleaned chunk by chunk.
+
+        With workers > 1 the date window is split into one slice per meet year. The slices are fetched and parsed
+        concurrently, each on its own pooled connection, and concatenated in year order before cleaning.
+
+        If the table's clean view has been built (see build_clean_view) the rows are read from it instead, so only
+        rows that pass the business rules cross the wire and there is no cleaning left to do.
+
+        The result is compacted by encode_app_dtypes: the app's filter columns come back as categoricals and the
+        other columns downcast by reduce_mem_usage, e.g. weights as float32. Weights are in kilograms only; the app
+        derives pounds for the rows it displays (see data_cleaning.display_view).
+
+        Parameters:
+        - table_name (str): The name of the table.
+        - workers (int): The number of slices fetched at once.
+        - spool_size (int): Bytes of CSV kept in memory per slice before its spool file moves to disk.
+        - use_clean_view (bool): Read from the clean view when it exists.
+
+        Returns:
+        - pd.DataFrame: The fetched data.
+        """
+
+        # Compare "Date" to plain literals so the predicate can use an index; ISO date strings also compare
+        # correctly against a table whose "Date" is still text
+        first_year = date.today().year - RETENTION_YEARS + 1
+        if workers > 1:
+            # The last slice is open-ended so meets dated after January 1st of next year are still included
+            date_ranges = [(f"{year}-01-01", f"{year + 1}-01-01") for year in range(first_year, date.today().year)]
+            date_ranges.append((f"{date.today().year}-01-01", None))
+        else:
+            date_ranges = [(f"{first_year}-01-01", None)]
+
+        clean_view = self.get_clean_view(table_name) if use_clean_view else None
+
+        # Fetch data from the table, or from its clean view which already holds only the app's rows
+        queries = []
+        for since, until in date_ranges:
+            date_filter = sql.SQL('"Date" >= {}').format(sql.Literal(since))
+            if until is not None:
+                date_filter += sql.SQL(' AND "Date" < {}').format(sql.Literal(until))
+            if clean_view is None:
+                date_filter += sql.SQL(' AND ' + APP_ROW_FILTER)
+            queries.append(sql.SQL("SELECT {} FROM {} WHERE {}").format(
+                sql.SQL(', ').join(sql.Identifier(col) for col in FETCH_COLUMNS),
+                sql.Identifier(clean_view or table_name), date_filter))
+
+        if len(queries) == 1:
+            result = self.copy_query_to_frame(queries[0], spool_size)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # map yields in submission order, so the slices are concatenated oldest year first
+                slices = list(executor.map(lambda query: self.copy_query_to_frame(query, spool_size), queries))
+            # Empty years would turn "Date" into an object column
+            result = pd.concat([frame for frame in slices if len(frame)] or slices[:1], ignore_index=True)
+
+        # Apply custom functions to the whole result
+        if clean_view is None:
+            remove_special_chars(result)
+            result = apply_business_rules(result)
+
+        return encode_app_dtypes(result.reset_index(drop=True))
+
+    def get_clean_view(self, table_name):
+        """
+        Look up a table's clean view.
+
+        Parameters:
+        - table_name (str): The name of the table.
+
+        Returns:
+        - str or None: The view's name, or None if it hasn't been built.
+        """
+
+        view_name = CLEAN_VIEWS.get(table_name, f"{table_name}_clean")
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (sql.Identifier(view_name).as_string(conn),))
+            return view_name if cur.fetchone()[0] else None
+
+    def build_clean_view(self, table_name) -> str:
+        """
+        (Re)build the materialized view of the rows fetch_data hands to the app, with remove_special_chars and
+        apply_business_rules done in SQL, so the rules run once per ETL instead of on every app start.
+
+        The new view is built under a temporary name while the current one keeps serving reads, then swapped in by
+        dropping the old view and renaming the new one. The swap is the only step that takes an exclusive lock on
+        the view, so readers wait for a rename rather than for the whole rebuild, and the transaction means they
+        never see it half built. Each rebuild also moves the view's retention window forward.
+
+        Lifters with neither an age class nor a birth year class are left out of the view, whereas
+        apply_business_rules raises on them.
+
+        Parameters:
+        - table_name (str): The name of the table.
+
+        Returns:
+        - str: The name of the view.
+        """
+
+        view_name = CLEAN_VIEWS.get(table_name, f"{table_name}_clean")
+        next_view_name = f"{view_name}_next"
+        since = f"{date.today().year - RETENTION_YEARS + 1}-01-01"
+        select_list = sql.SQL(', ').join(
+            sql.SQL(CLEAN_VIEW_EXPRESSIONS[col] + ' AS {}').format(sql.Identifier(col)) if col in CLEAN_VIEW_EXPRESSIONS
+            else sql.Identifier(col) for col in FETCH_COLUMNS)
+
+        with self.connection() as conn, conn.cursor() as cur:
+            try:
+                # Left behind by a rebuild that failed partway, if any
+                cur.execute(sql.SQL("DROP MATERIALIZED VIEW IF EXISTS {};").format(sql.Identifier(next_view_name)))
+                cur.execute(sql.SQL("CREATE MATERIALIZED VIEW {} AS SELECT {} FROM {} WHERE \"Date\" >= {} AND "
+                                    + APP_ROW_FILTER + " AND " + CLEAN_VIEW_FILTER + ";").format(
+                    sql.Identifier(next_view_name), select_list, sql.Identifier(table_name), sql.Literal(since)))
+                # Serves the date predicates of fetch_data and its year slices
+                cur.execute(sql.SQL('CREATE INDEX {} ON {} ("Date");').format(
+                    sql.Identifier(f"{next_view_name}_date_idx"), sql.Identifier(next_view_name)))
+                cur.execute(sql.SQL("ANALYZE {};").format(sql.Identifier(next_view_name)))
+
+                cur.execute(sql.SQL("DROP MATERIALIZED VIEW IF EXISTS {};").format(sql.Identifier(view_name)))
+                cur.execute(sql.SQL("ALTER MATERIALIZED VIEW {} RENAME TO {};").format(
+                    sql.Identifier(next_view_name), sql.Identifier(view_name)))
+                cur.execute(sql.SQL("ALTER INDEX {} RENAME TO {};").format(
+                    sql.Identifier(f"{next_view_name}_date_idx"), sql.Identifier(f"{view_name}_date_idx")))
+                conn.commit()
+            except psycopg2.Error as e:
+                logging.error(f"Error: {e}")
+                conn.rollback()
+                raise
+        return view_name
+
+    def check_clean_view_parity(self, table_name) -> bool:
+        """
+        Check that fetch_data returns the same rows through the clean view as through the pandas business rules.
+
+        Parameters:
+        - table_name (str): The name of the table.
+
+        Returns:
+        - bool: True if both paths return the same rows, ignoring order.
+        """
+
+        if self.get_clean_view(table_name) is None:
+            print(f"'{table_name}' has no clean view to check")
+            return False
+
+        via_view = self.fetch_data(table_name)
+        via_pandas = self.fetch_data(table_name, use_clean_view=False)
+        columns = list(via_pandas.columns)
+        try:
+            pd.testing.assert_frame_equal(via_view.sort_values(columns).reset_index(drop=True),
+                                          via_pandas.sort_values(columns).reset_index(drop=True))
+        except AssertionError as e:
+            print(f"The clean view of '{table_name}' differs from the pandas business rules: {e}")
+            return False
+        return True
+
+    def get_dataset_version(self, table_name):
+        """
+        Look up when a table's recorded state last changed, which is the version its snapshots are tagged with.
+
+        Parameters:
+        - table_name (str): The name of the table.
+
+        Returns:
+        - str or None: The "UpdatedAt" of the table's dataset_state row, or None if no load has been recorded.
+        """
+
+        with self.connection() as conn, conn.cursor() as cur:
+            if self.get_dataset_state(cur, table_name) is None:
+                return None
+            cur.execute('SELECT "UpdatedAt" FROM dataset_state WHERE "TableName" = %s;', (table_name,))
+            return cur.fetchone()[0].isoformat()
+
+    def archive_already_loaded(self, table_name, archive_sha256) -> bool:
+        """
+        Check whether a table was last brought up to date from this archive, as recorded in dataset_state, so the
+        ETL can skip extracting it again. A fresh or restored database has no record of it and is loaded.
+
+        Parameters:
+        - table_name (str): The name of the table.
+        - archive_sha256 (str): The hash of the downloaded archive.
+
+        Returns:
+        - bool: True if dataset_state records the same archive hash for the table.
+        """
+
+        if archive_sha256 is None:
+            return False
+        with self.connection() as conn, conn.cursor() as cur:
+            if self.get_dataset_state(cur, table_name) is None:
+                return False
+            cur.execute('SELECT "ArchiveSha256" FROM dataset_state WHERE "TableName" = %s;', (table_name,))
+            return cur.fetchone()[0] == archive_sha256
+
+    def mark_archive_loaded(self, table_name, archive_sha256) -> None:
+        """
+        Record an archive that had no new rows for a table as the one it is up to date with. Loads record their
+        archive themselves; "UpdatedAt" is left alone, as the table's data and so its snapshots haven't changed.
+
+        Parameters:
+        - table_name (str): The name of the table.
+        - archive_sha256 (str): The hash of the archive.
+
+        Returns:
+        None
+        """
+
+        with self.connection() as conn, conn.cursor() as cur:
+            if self.get_dataset_state(cur, table_name) is not None:
+                cur.execute('UPDATE dataset_state SET "ArchiveSha256" = %s WHERE "TableName" = %s;',
+                            (archive_sha256, table_name))
+            conn.commit()
+
+    def write_snapshot(self, table_name, snapshot_dir=APP_SNAPSHOT_DIR) -> str:
+        """
+        Write the app's data for a table as a columnar snapshot the app maps at startup instead of calling fetch_data.
+
+        Parameters:
+        - table_name (str): The name of the table.
+        - snapshot_dir (str): The directory holding the snapshot versions.
+
+        Returns:
+        - str: The path of the new snapshot version.
+        """
+
+        source_version = self.get_dataset_version(table_name)
+        df = self.fetch_data(table_name)
+        version_dir = write_snapshot(df, snapshot_dir, source_version)
+        print(f"Wrote a snapshot of {len(df)} rows from '{table_name}' to {version_dir}")
+        return version_dir
+
+    def load_app_data(self, table_name, snapshot_dir=APP_SNAPSHOT_DIR) -> pd.DataFrame:
+        """
+        Load the app's data from the current snapshot, falling back to fetch_data when there is no snapshot or it
+        was written before the table's last load.
+
+        Checking for staleness is a single lookup in dataset_state; if the database can't be reached the snapshot is
+        used as it is. After a fallback the fetched data is written as the new snapshot, so the next worker to start
+        can map it.
+
+        Parameters:
+        - table_name (str): The name of the table.
+        - snapshot_dir (str): The directory holding the snapshot versions.
+
+        Returns:
+        - pd.DataFrame: The same data as fetch_data.
+        """
+
+        manifest = read_snapshot_manifest(snapshot_dir)
+        try:
+            current_version = self.get_dataset_version(table_name)
+        except psycopg2.Error as e:
+            if manifest is None:
+                raise
+            print(f"Couldn't check the snapshot against '{table_name}', using it as is: {str(e).splitlines()[0]}")
+            return load_snapshot(manifest)
+
+        if manifest is not None and manifest['source_version'] == current_version:
+            return load_snapshot(manifest)
+
+        print(f"No current snapshot of '{table_name}' in {snapshot_dir}, fetching it from the database")
+        df = self.fetch_data(table_name)
+        try:
+            write_snapshot(df, snapshot_dir, current_version)
+        except OSError as e:
+            print(f"Couldn't write a snapshot to {snapshot_dir}: {e}")
+        return df
+
+    def collect_max_dt(self, table_name) -> str:
+        """
+        Collect the maximum date from a PostgreSQL table, from dataset_state when a load has been recorded.
+
+        Parameters:
+        - table_name (str): The name of the table.
+
+        Returns:
+        - str: The maximum date in string format.
+        """
+
+        with self.connection() as conn, conn.cursor() as cur:
+            state = self.get_dataset_state(cur, table_name)
+            if state is not None:
+                max_date = state[0]
+            else:
+                query = f"""SELECT MAX("Date") FROM {table_name};"""
+                cur.execute(query)
+                max_date = cur.fetchone()[0]
+
+        # Return a string whether "Date" is a DATE or a legacy text column
+        max_date_str = None if max_date is None else str(max_date)
+
+        return max_date_str
+
+
+    def collect_cnt_records(self, table_name) -> int:
+        """
+        Collect the count of records from a PostgreSQL table, from dataset_state when a load has been recorded.
+
+        Parameters:
+        - table_name (str): The name of the table.
+
+        Returns:
+        - int: The count of records.
+        """
+
+        with self.connection() as conn, conn.cursor() as cur:
+            state = self.get_dataset_state(cur, table_name)
+            if state is not None:
+                current_cnt = state[1]
+            else:
+                query = f"""SELECT count(*) FROM {table_name};"""
+                cur.execute(query)
+                current_cnt = cur.fetchone()[0]
 
         return current_cnt
 
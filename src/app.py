@@ -14,7 +14,7 @@ import plotly.figure_factory as ff
 from datetime import datetime
 from scipy.stats import percentileofscore
 from data_retrieval import PowerliftingDataRetriever
-from data_cleaning import clean_same_names, calculate_wilks, classify_wilks
+from data_cleaning import clean_same_names, calculate_wilks, classify_wilks, display_view, to_kg
 from postgres_ingestion import PowerliftingDataHandler
 import time
 
@@ -151,7 +151,8 @@ except ImportError:
 
 
 postgres_instance = PowerliftingDataHandler(database_url)
-df = postgres_instance.fetch_data(table_name='powerlifting_data')
+df = postgres_instance.load_app_data(table_name='powerlifting_data') #maps the ETL's snapshot, or falls back to fetch_data
+postgres_instance.close() #the app only needs the database at startup; don't hand open connections to forked workers
 
 user_total = {}
 user_data = {}
@@ -310,7 +311,7 @@ def render_comp_data():
                     dcc.Dropdown(
                         id='federation-filter-t2',
                         options=[{'label': Federation, 'value': Federation} for Federation in
-                                 sorted(df['Federation'].unique()) if
+                                 sorted(df['Federation'].dropna().unique()) if
                                  Federation is not None],
                         multi=True,
                         placeholder='Select Federation...',
@@ -325,7 +326,7 @@ def render_comp_data():
                     dcc.Dropdown(
                         id='user-state-t2',
                         options=[{'label': state, 'value': state} for state in
-                                 sorted(filter(None, df['MeetState'].unique())) if
+                                 sorted(filter(None, df['MeetState'].dropna().unique())) if
                                  state is not None],
                         multi=True,
                         placeholder='Select State...',
@@ -424,7 +425,7 @@ def render_user_stats():
 
         dcc.Dropdown(
             id='federation-filter',
-            options=[{'label': Federation, 'value': Federation} for Federation in sorted(df['Federation'].unique()) if
+            options=[{'label': Federation, 'value': Federation} for Federation in sorted(df['Federation'].dropna().unique()) if
                      Federation is not None],
             multi=True,
             placeholder='Select Federation...',
@@ -649,8 +650,8 @@ def update_dropdown_options(selected_federation, selected_sex):
     else:
         # Filter options based on both selected federation and sex
         subset_df = df[(df['Federation'].isin(selected_federation)) & (df['Sex'] == selected_sex)]
-        weightclass_options = [{'label': weightClass, 'value': weightClass} for weightClass in sorted(subset_df['WeightClassKg'].unique(), key=float) if weightClass is not None]
-        ageclass_options = [{'label': ageClass, 'value': ageClass} for ageClass in sorted(subset_df['AgeClass'].unique()) if ageClass is not None]
+        weightclass_options = [{'label': weightClass, 'value': weightClass} for weightClass in sorted(subset_df['WeightClassKg'].dropna().unique(), key=float) if weightClass is not None]
+        ageclass_options = [{'label': ageClass, 'value': ageClass} for ageClass in sorted(subset_df['AgeClass'].dropna().unique()) if ageClass is not None]
 
     return weightclass_options, ageclass_options
 
@@ -677,8 +678,9 @@ def load_and_filter_data(n_clicks, selected_weightclasses, selected_ageclasses,
             # Filter the data based on selections
             filtered_df = df[df['WeightClassKg'].isin(selected_weightclasses) & df['AgeClass'].isin(selected_ageclasses) & (df['Sex'] == selected_sex) & df['Federation'].isin(selected_federation)]
 
-            # Populate the filtered data in the DataTable
-            return dash_table.DataTable(filtered_df.to_dict('records'), [{"name": i, "id": i} for i in filtered_df.columns], page_size=10,
+            # Populate the filtered data in the DataTable, with the Lb columns derived for just these rows
+            display_df = display_view(filtered_df)
+            return dash_table.DataTable(display_df.to_dict('records'), [{"name": i, "id": i} for i in display_df.columns], page_size=10,
                                         style_data={'backgroundColor': 'rgba(0,0,0,0)', 'color': 'white'},
                                         style_header={'backgroundColor': 'rgba(0,0,0,0)', 'color': 'white'},
                                         style_data_conditional=highlight_condition,
@@ -700,12 +702,8 @@ def load_and_filter_data(n_clicks, selected_weightclasses, selected_ageclasses,
 def update_kpi_text(n_clicks, switch, gender, total, bw):
 
     if n_clicks:
-        if switch:
-            wilks_e = calculate_wilks(gender=gender, total=total, bodyweight=bw, lbs = True)
-            print('On: ', wilks_e)
-        else:
-            wilks_e = calculate_wilks(gender=gender, total=total, bodyweight=bw, lbs = False)
-            print('Off: ', wilks_e)
+        wilks_e = calculate_wilks(gender=gender, total=total, bodyweight=bw, lbs=switch)
+        print('On: ' if switch else 'Off: ', wilks_e)
 
         kpi_value = classify_wilks(wilks_e)
 
@@ -861,15 +859,11 @@ def add_user_data_calculation(tested, federation, sex, n_clicks, lbs_switch, nam
 
     if n_clicks:
         if name and age and weight and federation:
-            if lbs_switch:
-                user_data.update(
-                    {'Name': name, 'Age': age, 'BodyweightKg': weight / float(2.2), 'Best3SquatKg': squat,
-                     'Best3BenchKg': bench,
-                     'Best3DeadliftKg': deadlift})
-            else:
-                user_data.update(
-                    {'Name': name, 'Age': age, 'BodyweightKg': weight, 'Best3SquatKg': squat, 'Best3BenchKg': bench,
-                     'Best3DeadliftKg': deadlift})
+            # Entered weights are converted to kilograms once, so everything below compares kilograms to kilograms
+            user_data.update(
+                {'Name': name, 'Age': age, 'BodyweightKg': to_kg(weight, lbs_switch),
+                 'Best3SquatKg': to_kg(squat, lbs_switch), 'Best3BenchKg': to_kg(bench, lbs_switch),
+                 'Best3DeadliftKg': to_kg(deadlift, lbs_switch)})
 
             if tested % 2 == 0:
 
@@ -919,7 +913,7 @@ def add_user_data_calculation(tested, federation, sex, n_clicks, lbs_switch, nam
 
                 estimated_comp_class.update({'ageclass': closest_age_class, 'weightclass': closest_lower_weight_class})
 
-            df_grouped = filtered_df.groupby('Name').agg(squat=('Best3SquatKg', 'max'),
+            df_grouped = filtered_df.groupby('Name', observed=True).agg(squat=('Best3SquatKg', 'max'),
                                                          bench=('Best3BenchKg', 'max'),
                                                          deadlift=('Best3DeadliftKg', 'max'),
                                                          wilks=('Wilks', 'max')
@@ -928,46 +922,25 @@ def add_user_data_calculation(tested, federation, sex, n_clicks, lbs_switch, nam
 
             squat_perc, bench_perc, deadlift_perc = None, None, None
             if squat:
-                if lbs_switch:
-                    df_grouped['squat'] = df_grouped['squat'].fillna(0)
-                    squat_perc = percentileofscore(df_grouped['squat'], user_data['Best3SquatKg'] / float(2.2))
-                    squat_perc_rounded = '{:.1%}'.format(squat_perc / 100)
-                    squat_perc_val = squat_perc
-                    user_data_perc.update({'squat_perc': squat_perc_val})
-                else:
-                    df_grouped['squat'] = df_grouped['squat'].fillna(0)
-                    squat_perc = percentileofscore(df_grouped['squat'], user_data['Best3SquatKg'])
-                    squat_perc_rounded = '{:.1%}'.format(squat_perc / 100)
-                    squat_perc_val = squat_perc
-                    user_data_perc.update({'squat_perc': squat_perc_val})
+                df_grouped['squat'] = df_grouped['squat'].fillna(0)
+                squat_perc = percentileofscore(df_grouped['squat'], user_data['Best3SquatKg'])
+                squat_perc_rounded = '{:.1%}'.format(squat_perc / 100)
+                squat_perc_val = squat_perc
+                user_data_perc.update({'squat_perc': squat_perc_val})
 
             if bench:
-                if lbs_switch:
-                    df_grouped['bench'] = df_grouped['bench'].fillna(0)
-                    bench_perc = percentileofscore(df_grouped['bench'], user_data['Best3BenchKg'] / float(2.2))
-                    bench_perc_rounded = '{:.1%}'.format(bench_perc / 100)
-                    bench_perc_val = bench_perc
-                    user_data_perc.update({'bench_perc': bench_perc_val})
-                else:
-                    df_grouped['bench'] = df_grouped['bench'].fillna(0)
-                    bench_perc = percentileofscore(df_grouped['bench'], user_data['Best3BenchKg'])
-                    bench_perc_rounded = '{:.1%}'.format(bench_perc / 100)
-                    bench_perc_val = bench_perc
-                    user_data_perc.update({'bench_perc': bench_perc_val})
+                df_grouped['bench'] = df_grouped['bench'].fillna(0)
+                bench_perc = percentileofscore(df_grouped['bench'], user_data['Best3BenchKg'])
+                bench_perc_rounded = '{:.1%}'.format(bench_perc / 100)
+                bench_perc_val = bench_perc
+                user_data_perc.update({'bench_perc': bench_perc_val})
 
             if deadlift:
-                if lbs_switch:
-                    df_grouped['deadlift'] = df_grouped['deadlift'].fillna(0)
-                    deadlift_perc = percentileofscore(df_grouped['deadlift'], user_data['Best3DeadliftKg'] / float(2.2))
-                    deadlift_perc_rounded = '{:.1%}'.format(deadlift_perc / 100)
-                    deadlift_perc_val = deadlift_perc
-                    user_data_perc.update({'deadlift_perc': deadlift_perc_val})
-                else:
-                    df_grouped['deadlift'] = df_grouped['deadlift'].fillna(0)
-                    deadlift_perc = percentileofscore(df_grouped['deadlift'], user_data['Best3DeadliftKg'])
-                    deadlift_perc_rounded = '{:.1%}'.format(deadlift_perc / 100)
-                    deadlift_perc_val = deadlift_perc
-                    user_data_perc.update({'deadlift_perc': deadlift_perc_val})
+                df_grouped['deadlift'] = df_grouped['deadlift'].fillna(0)
+                deadlift_perc = percentileofscore(df_grouped['deadlift'], user_data['Best3DeadliftKg'])
+                deadlift_perc_rounded = '{:.1%}'.format(deadlift_perc / 100)
+                deadlift_perc_val = deadlift_perc
+                user_data_perc.update({'deadlift_perc': deadlift_perc_val})
 
             if len(federation) == 1:
                 federation = federation[0]
@@ -1170,7 +1143,7 @@ def update_kpi_competitions(selected_lifter):
 
         if len(competition_lifter_df) != 0:
 
-            competition_cnt = competition_lifter_df.groupby(['MeetName', 'Date']).size().reset_index(name='Count').shape[0]
+            competition_cnt = competition_lifter_df.groupby(['MeetName', 'Date'], observed=True).size().reset_index(name='Count').shape[0]
 
             # unique_lifter_validation = clean_same_names(competition_lifter_df, 1)
             unique_lifter_validation = clean_same_names(competition_lifter_df)
@@ -1243,7 +1216,7 @@ def update_line_chart(selected_lifter, view_type):
         cols = ['Date', 'MeetName']
 
         lifter_stats_df = lifter_stats_df[(lifter_stats_df['Name'] == selected_lifter) & (lifter_stats_df['Event'] == 'SBD')]
-        lifter_stats_df = lifter_stats_df.drop_duplicates(subset=cols)
+        lifter_stats_df = display_view(lifter_stats_df.drop_duplicates(subset=cols)) #float32 widened and rounded first, or hovers show 142.89999389648438
 
 
         unique_lifter_validation = clean_same_names(lifter_stats_df)
@@ -1251,9 +1224,7 @@ def update_line_chart(selected_lifter, view_type):
             cols.append('name_with_persona')
             lifter_stats_df = clean_same_names(lifter_stats_df)
 
-        lifter_stats_df_agg = lifter_stats_df.groupby(cols).agg({'Best3SquatKg': 'sum', 'Best3BenchKg': 'sum', 'Best3DeadliftKg': 'sum'}).reset_index()
-        lifter_stats_df_agg[['Best3SquatKg', 'Best3BenchKg', 'Best3DeadliftKg']] = lifter_stats_df_agg[
-            ['Best3SquatKg', 'Best3BenchKg', 'Best3DeadliftKg']].astype(float)
+        lifter_stats_df_agg = lifter_stats_df.groupby(cols, observed=True).agg({'Best3SquatKg': 'sum', 'Best3BenchKg': 'sum', 'Best3DeadliftKg': 'sum'}).round(2).reset_index()
 
         facet_col_expression = f'name_with_persona' if 'name_with_persona' in cols else None
 
@@ -1315,16 +1286,14 @@ def update_line_chart(selected_lifter, view_type):
 
 
         lifter_stats_df = lifter_stats_df[(lifter_stats_df['Name'] == selected_lifter) & (lifter_stats_df['Event'] == 'SBD')]
-        lifter_stats_df = lifter_stats_df.drop_duplicates(subset=cols)
+        lifter_stats_df = display_view(lifter_stats_df.drop_duplicates(subset=cols))
 
         unique_lifter_validation = clean_same_names(lifter_stats_df)
         if unique_lifter_validation['persona'].nunique() > 1:
             cols.append('name_with_persona')
             lifter_stats_df = clean_same_names(lifter_stats_df)
 
-        lifter_stats_df_agg = lifter_stats_df.groupby(cols).agg({'Best3SquatKg': 'sum', 'Best3BenchKg': 'sum', 'Best3DeadliftKg': 'sum'}).reset_index()
-        lifter_stats_df_agg[['Best3SquatKg', 'Best3BenchKg', 'Best3DeadliftKg']] = lifter_stats_df_agg[
-            ['Best3SquatKg', 'Best3BenchKg', 'Best3DeadliftKg']].astype(float)
+        lifter_stats_df_agg = lifter_stats_df.groupby(cols, observed=True).agg({'Best3SquatKg': 'sum', 'Best3BenchKg': 'sum', 'Best3DeadliftKg': 'sum'}).round(2).reset_index()
 
         facet_col_expression = f'name_with_persona' if 'name_with_persona' in cols else None
 
@@ -1384,17 +1353,15 @@ def update_line_chart(selected_lifter, view_type):
 
         lifter_stats_df = lifter_stats_df[
             (lifter_stats_df['Name'] == selected_lifter) & (lifter_stats_df['Event'] == 'SBD')]
-        lifter_stats_df = lifter_stats_df.drop_duplicates(subset=cols)
+        lifter_stats_df = display_view(lifter_stats_df.drop_duplicates(subset=cols))
 
         unique_lifter_validation = clean_same_names(lifter_stats_df)
         if unique_lifter_validation['persona'].nunique() > 1:
             cols.append('name_with_persona')
             lifter_stats_df = clean_same_names(lifter_stats_df)
 
-        lifter_stats_df_agg = lifter_stats_df.groupby(cols).agg(
-            {'Best3SquatKg': 'sum', 'Best3BenchKg': 'sum', 'Best3DeadliftKg': 'sum'}).reset_index()
-        lifter_stats_df_agg[['Best3SquatKg', 'Best3BenchKg', 'Best3DeadliftKg']] = lifter_stats_df_agg[
-            ['Best3SquatKg', 'Best3BenchKg', 'Best3DeadliftKg']].astype(float)
+        lifter_stats_df_agg = lifter_stats_df.groupby(cols, observed=True).agg(
+            {'Best3SquatKg': 'sum', 'Best3BenchKg': 'sum', 'Best3DeadliftKg': 'sum'}).round(2).reset_index()
 
         facet_col_expression = f'name_with_persona' if 'name_with_persona' in cols else None
 
@@ -0,0 +1,16 @@
+import gc
+import os
+
+# Shared-data mode: import the app, and with it load df, once in the master and fork the workers from it, so the
+# workers share the master's memory pages instead of each building a private copy of the dataset.
+# Set STRENGTHPULSE_SHARED_DATA=0 to load the app in every worker instead
+preload_app = os.environ.get('STRENGTHPULSE_SHARED_DATA', '1') != '0'
+
+# With the dataset shared, the worker count follows the CPUs available rather than the instance's RAM
+workers = int(os.environ.get('WEB_CONCURRENCY', len(os.sched_getaffinity(0)) * 2 + 1))
+
+
+def pre_fork(server, worker):
+    # Move everything the app built at import time out of the garbage collector's reach, so collections in the
+    # workers don't write to those objects' pages and unshare them
+    gc.freeze()
@@ -0,0 +1,93 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root rather than in an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def database_url():
+    '''The PostgreSQL database the database tests run against; they are skipped when DATABASE_URL isn't set'''
+    url = os.environ.get('DATABASE_URL')
+    if not url:
+        pytest.skip('DATABASE_URL is not set')
+    return url
+
+
+@pytest.fixture
+def postgres_instance(database_url):
+    from postgres_ingestion import PowerliftingDataHandler
+
+    handler = PowerliftingDataHandler(database_url)
+    yield handler
+    handler.close()
+
+
+def synthetic_powerlifting_rows(rows=3000, seed=1):
+    '''Rows shaped like the filtered OpenPowerlifting data, covering every branch of the app's business rules'''
+    import numpy as np
+    import pandas as pd
+    from datetime import date
+
+    rng = np.random.default_rng(seed)
+    years = rng.integers(2010, date.today().year + 1, rows)
+    frame = pd.DataFrame({
+        'Name': [f"Lifter {i}" for i in rng.integers(0, rows // 5, rows)],
+        'Sex': rng.choice(['M', 'F'], rows),
+        'Event': rng.choice(['SBD', 'B', 'D'], rows),
+        'Equipment': rng.choice(['Raw', 'Wraps', 'Single-ply'], rows),
+        'Age': rng.choice([np.nan, 11.5, 17.0, 23.5, 31.0, 45.5], rows),
+        'BirthYearClass': rng.choice([None, '24-39', '40-49'], rows),
+        'AgeClass': rng.choice([None, '24-34', '35-39', '40-44'], rows, p=[0.2, 0.3, 0.3, 0.2]),
+        'Division': rng.choice(['Open', 'Juniors', None], rows),
+        'BodyweightKg': np.round(rng.uniform(45, 150, rows), 2),
+        'WeightClassKg': rng.choice(['83', '93', '120+', None], rows),
+        'Best3SquatKg': np.round(rng.uniform(60, 380, rows), 1),
+        'Best3BenchKg': np.round(rng.uniform(40, 280, rows), 1),
+        'Best3DeadliftKg': np.round(rng.uniform(80, 400, rows), 1),
+        'TotalKg': np.round(rng.uniform(200, 1000, rows), 1),
+        'Place': rng.choice(['1', '2', '3', 'DQ'], rows),
+        'Wilks': np.round(rng.uniform(150, 600, rows), 2),
+        'Tested': rng.choice(['Yes', None], rows),
+        'Country': 'USA',
+        'Federation': rng.choice(['USAPL', 'USPA', 'RPS'], rows),
+        'Date': pd.to_datetime([f"{year}-{month:02d}-15" for year, month in zip(years, rng.integers(1, 13, rows))]),
+        'MeetCountry': rng.choice(['USA', 'USA', 'USA', 'Canada'], rows),
+        'MeetState': rng.choice(['TX', 'CA', 'NY', None], rows),
+        'MeetName': [f"Meet {i}" for i in rng.integers(0, 200, rows)],
+    })
+    # apply_business_rules raises on lifters with neither an age class nor a birth year class
+    frame.loc[frame['AgeClass'].isna() & frame['BirthYearClass'].isna(), 'BirthYearClass'] = '24-39'
+    return frame
+
+
+@pytest.fixture
+def powerlifting_table(request, postgres_instance):
+    '''
+    A scratch table loaded with synthetic_powerlifting_rows, dropped again with its clean view and load records.
+    Parametrize it indirectly with True for a year-partitioned table.
+    '''
+    from psycopg2 import sql
+
+    table_name = 'test_powerlifting_data'
+
+    def drop_table():
+        with postgres_instance.connection() as conn, conn.cursor() as cur:
+            cur.execute(sql.SQL("DROP MATERIALIZED VIEW IF EXISTS {};").format(sql.Identifier(f"{table_name}_clean")))
+            cur.execute(sql.SQL("DROP TABLE IF EXISTS {}, {} CASCADE;").format(
+                sql.Identifier(table_name), sql.Identifier(f"{table_name}_rejects")))
+            for metadata_table in ('etl_runs', 'dataset_state'):
+                cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (metadata_table,))
+                if cur.fetchone()[0]:
+                    cur.execute(sql.SQL('DELETE FROM {} WHERE "TableName" = %s;').format(
+                        sql.Identifier(metadata_table)), (table_name,))
+            conn.commit()
+
+    drop_table()
+    rows = synthetic_powerlifting_rows()
+    postgres_instance.create_table(rows, table_name, partition_by_year=getattr(request, 'param', False))
+    postgres_instance.insert_data(rows, table_name, quarantine=False)
+    yield table_name
+    drop_table()
@@ -0,0 +1,90 @@
+import importlib
+import io
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+from conftest import synthetic_powerlifting_rows
+from data_cleaning import apply_business_rules, encode_app_dtypes, remove_special_chars
+from postgres_ingestion import FETCH_COLUMNS, FETCH_DTYPES, PowerliftingDataHandler
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+
+def app_frame():
+    '''The app's DataFrame as fetch_data builds it, with SQL NULLs read back from COPY as NaN'''
+    rows = synthetic_powerlifting_rows()
+    rows = rows[rows['Age'].notna() & (rows['Place'] != 'DQ') & (rows['MeetCountry'] == 'USA')][FETCH_COLUMNS]
+    frame = pd.read_csv(io.StringIO(rows.to_csv(index=False)), dtype=FETCH_DTYPES, parse_dates=['Date'],
+                        keep_default_na=False, na_values=[''])
+    remove_special_chars(frame)
+    return encode_app_dtypes(apply_business_rules(frame).reset_index(drop=True))
+
+
+@pytest.fixture
+def app_module(monkeypatch):
+    '''src/app.py imported over app_frame() instead of the database'''
+    for module in ('dash', 'dash_bootstrap_components', 'dash_daq', 'plotly'):
+        pytest.importorskip(module)
+
+    df = app_frame()
+    monkeypatch.setattr(PowerliftingDataHandler, 'load_app_data', lambda self, table_name: df)
+    monkeypatch.syspath_prepend(SRC_DIR)
+    monkeypatch.chdir(SRC_DIR)
+    try:
+        yield importlib.import_module('app')
+    finally:
+        sys.modules.pop('app', None)
+
+
+def test_app_layout_builds_with_missing_meet_state(app_module):
+    assert app_module.app.layout is not None
+    for render in (app_module.render_landing_page, app_module.render_comp_data, app_module.render_user_stats,
+                   app_module.render_comparative_analysis):
+        render()
+
+
+def dropdown_options(component):
+    '''The values offered by each dcc.Dropdown in a rendered layout, by id'''
+    from dash import dcc
+
+    options = {}
+    if isinstance(component, dcc.Dropdown):
+        options[component.id] = [option['value'] for option in component.options]
+    children = getattr(component, 'children', None)
+    for child in children if isinstance(children, (list, tuple)) else [children]:
+        if child is not None:
+            options.update(dropdown_options(child))
+    return options
+
+
+def test_dropdown_options_sort_with_missing_values(app_module):
+    assert app_module.df['MeetState'].isna().any()
+
+    options = dropdown_options(app_module.render_comp_data())
+    assert options['federation-filter-t2'] == ['RPS', 'USAPL', 'USPA']
+    assert options['user-state-t2'] == ['CA', 'NY', 'TX']
+    assert dropdown_options(app_module.render_user_stats())['federation-filter'] == ['RPS', 'USAPL', 'USPA']
+
+    # update_dropdown_options is defined twice in app.py, so reach the weight and age class callback by its outputs
+    callback = app_module.app.callback_map['..weightclass-filter.options...ageclass-filter.options..']['callback']
+    weight_classes, age_classes = callback.__wrapped__(['RPS', 'USAPL', 'USPA'], 'M')
+    assert [option['value'] for option in weight_classes] == ['83', '93', '120']
+    age_classes = [option['value'] for option in age_classes]
+    assert age_classes and age_classes == sorted(age_classes)
+
+
+def test_line_charts_plot_kept_precision(app_module, monkeypatch):
+    monkeypatch.setattr(app_module.time, 'sleep', lambda seconds: None)
+    df = app_module.df
+    lifter = df.loc[df['Event'] == 'SBD', 'Name'].value_counts().index[0]
+
+    for view_type in ('date', 'weight', 'age'):
+        figure, _ = app_module.update_line_chart(lifter, view_type)
+        assert len(figure.data) == 3
+        for trace in figure.data:
+            values = list(trace.y) + ([] if view_type == 'date' else list(trace.x))
+            assert values
+            assert all(value == round(value, 2) for value in values), (view_type, trace.name, values)
@@ -0,0 +1,149 @@
+import struct
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from psycopg2 import sql
+
+from postgres_ingestion import (BINARY_COPY_HEADER, BINARY_COPY_TRAILER, BinaryCopyReader, BinaryEncodingError,
+                                encode_binary_copy_rows)
+
+WIRE_FORMATS = {'smallint': '>h', 'integer': '>i', 'bigint': '>q', 'real': '>f', 'double precision': '>d'}
+
+
+def decode_binary_copy(payload, table_columns):
+    '''Decode a PGCOPY stream with struct, independently of the NumPy encoder'''
+    assert payload.startswith(b'PGCOPY\n\xff\r\n\x00')
+    flags, extension_length = struct.unpack_from('>ii', payload, 11)
+    assert (flags, extension_length) == (0, 0)
+    offset = 19
+    rows = []
+    while True:
+        (field_count,) = struct.unpack_from('>h', payload, offset)
+        offset += 2
+        if field_count == -1:
+            break
+        assert field_count == len(table_columns)
+        row = []
+        for _, data_type in table_columns:
+            (size,) = struct.unpack_from('>i', payload, offset)
+            offset += 4
+            if size == -1:
+                row.append(None)
+                continue
+            raw = payload[offset:offset + size]
+            offset += size
+            if data_type in WIRE_FORMATS:
+                assert size == struct.calcsize(WIRE_FORMATS[data_type])
+                row.append(struct.unpack(WIRE_FORMATS[data_type], raw)[0])
+            elif data_type == 'date':
+                row.append(date(2000, 1, 1) + timedelta(days=struct.unpack('>i', raw)[0]))
+            elif data_type == 'boolean':
+                row.append(raw == b'\x01')
+            else:
+                row.append(raw.decode('utf-8'))
+        rows.append(row)
+    assert offset == len(payload)
+    return rows
+
+
+def encode(frame, table_columns):
+    return BINARY_COPY_HEADER + encode_binary_copy_rows(frame, table_columns) + BINARY_COPY_TRAILER
+
+
+def test_values_nulls_and_dates_round_trip():
+    table_columns = [('Name', 'character varying'), ('Sex', 'USER-DEFINED'), ('Age', 'real'),
+                     ('Place', 'smallint'), ('Wilks', 'double precision'), ('Date', 'date'),
+                     ('Sanctioned', 'boolean'), ('MeetTown', 'text')]
+    frame = pd.DataFrame({
+        'Name': ['Zoë Ångström', 'John Doe', None, ''],
+        'Sex': pd.Categorical(['F', 'M', 'Mx', None]),
+        'Age': [23.5, np.nan, 40.0, 18.0],
+        'Place': pd.array([1, None, 3, 120], dtype='Int8'),
+        'Wilks': [412.34, 380.5, np.nan, 0.0],
+        'Date': pd.to_datetime(['2000-01-01', '1999-12-31', '2024-02-29', None]),
+        'Sanctioned': [True, False, None, True],
+    })
+
+    assert decode_binary_copy(encode(frame, table_columns), table_columns) == [
+        ['Zoë Ångström', 'F', 23.5, 1, 412.34, date(2000, 1, 1), True, None],
+        ['John Doe', 'M', None, None, 380.5, date(1999, 12, 31), False, None],
+        [None, 'Mx', 40.0, 3, None, date(2024, 2, 29), None, None],
+        [None, None, 18.0, 120, 0.0, None, True, None],
+    ]
+
+
+def test_text_numbers_and_dates_are_parsed():
+    table_columns = [('Age', 'integer'), ('BodyweightKg', 'real'), ('Date', 'date')]
+    frame = pd.DataFrame({'Age': ['31', '', None], 'BodyweightKg': ['82.5', '', '-0.5'],
+                          'Date': ['2019-06-01', '', None]}, dtype=object)
+
+    assert decode_binary_copy(encode(frame, table_columns), table_columns) == [
+        [31, 82.5, date(2019, 6, 1)],
+        [None, None, None],
+        [None, -0.5, None],
+    ]
+
+
+def test_empty_frame_encodes_no_tuples():
+    table_columns = [('Name', 'text'), ('Age', 'real')]
+    assert decode_binary_copy(encode(pd.DataFrame({'Name': [], 'Age': []}), table_columns), table_columns) == []
+
+
+@pytest.mark.parametrize('data_type, value', [
+    ('integer', 'abc'),
+    ('integer', 1.5),
+    ('smallint', 40000),
+    ('real', 1e300),
+    ('date', 'not a date'),
+])
+def test_unencodable_values_raise(data_type, value):
+    frame = pd.DataFrame({'Column': pd.Series([None, value], dtype=object)})
+    with pytest.raises(BinaryEncodingError, match=f'column Column: invalid input for type {data_type}'):
+        encode_binary_copy_rows(frame, [('Column', data_type)])
+
+
+def test_eager_reader_raises_before_copy_starts():
+    frame = pd.DataFrame({'Age': pd.Series(['31', 'abc'], dtype=object)})
+    with pytest.raises(BinaryEncodingError):
+        BinaryCopyReader([frame], [('Age', 'real')], eager=True)
+    # A lazy reader only fails once COPY reads it
+    reader = BinaryCopyReader([frame], [('Age', 'real')])
+    with pytest.raises(BinaryEncodingError):
+        reader.read()
+
+
+def test_empty_strings_load_as_null_in_both_formats(postgres_instance):
+    table_name = 'binary_copy_test'
+    frame = pd.DataFrame({'Name': ['Jane Doe', '', None], 'Division': ['', 'Open', ''],
+                          'Date': pd.to_datetime(['2020-01-01', '2020-01-02', '2020-01-03'])})
+
+    def drop_table(cur):
+        cur.execute(sql.SQL("DROP TABLE IF EXISTS {};").format(sql.Identifier(table_name)))
+        for metadata_table in ('etl_runs', 'dataset_state'):
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (metadata_table,))
+            if cur.fetchone()[0]:
+                cur.execute(sql.SQL('DELETE FROM {} WHERE "TableName" = %s;').format(sql.Identifier(metadata_table)),
+                            (table_name,))
+
+    loaded = {}
+    try:
+        for copy_format in ('csv', 'binary'):
+            with postgres_instance.connection() as conn, conn.cursor() as cur:
+                drop_table(cur)
+                cur.execute(sql.SQL('CREATE TABLE {} ("Name" VARCHAR(255), "Division" TEXT, "Date" DATE);').format(
+                    sql.Identifier(table_name)))
+                conn.commit()
+            postgres_instance.insert_data(frame, table_name, copy_format=copy_format, quarantine=False)
+            with postgres_instance.connection() as conn, conn.cursor() as cur:
+                cur.execute(sql.SQL('SELECT "Name", "Division" FROM {} ORDER BY "Date";').format(
+                    sql.Identifier(table_name)))
+                loaded[copy_format] = cur.fetchall()
+    finally:
+        with postgres_instance.connection() as conn, conn.cursor() as cur:
+            drop_table(cur)
+            conn.commit()
+
+    assert loaded['csv'] == [('Jane Doe', None), (None, 'Open'), (None, None)]
+    assert loaded['binary'] == loaded['csv']
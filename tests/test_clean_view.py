@@ -0,0 +1,44 @@
+from datetime import date
+
+import pytest
+from psycopg2 import sql
+
+
+def test_clean_view_matches_pandas_business_rules(postgres_instance, powerlifting_table):
+    postgres_instance.build_clean_view(powerlifting_table)
+
+    assert postgres_instance.check_clean_view_parity(powerlifting_table)
+
+
+def test_rebuild_swaps_in_the_new_view(postgres_instance, powerlifting_table):
+    view_name = postgres_instance.build_clean_view(powerlifting_table)
+    rows_before = len(postgres_instance.fetch_data(powerlifting_table))
+    with postgres_instance.connection() as conn, conn.cursor() as cur:
+        cur.execute(sql.SQL('DELETE FROM {} WHERE "Federation" = %s;').format(sql.Identifier(powerlifting_table)),
+                    ('RPS',))
+        conn.commit()
+
+    assert postgres_instance.build_clean_view(powerlifting_table) == view_name
+
+    after = postgres_instance.fetch_data(powerlifting_table)
+    assert 0 < len(after) < rows_before
+    assert 'RPS' not in set(after['Federation'])
+    with postgres_instance.connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT relname FROM pg_class WHERE relname LIKE %s ORDER BY relname;", (f"{view_name}%",))
+        assert [relname for (relname,) in cur.fetchall()] == [view_name, f"{view_name}_date_idx"]
+
+
+def test_clean_view_leaves_out_lifters_without_an_age_class(postgres_instance, powerlifting_table):
+    with postgres_instance.connection() as conn, conn.cursor() as cur:
+        cur.execute(sql.SQL('INSERT INTO {} ("Name", "Sex", "Event", "Age", "AgeClass", "BirthYearClass", '
+                            '"WeightClassKg", "Place", "Country", "Federation", "Date", "MeetCountry", "MeetName") '
+                            "VALUES ('No Class', 'M', 'SBD', 30, NULL, NULL, '93', '1', 'USA', 'USAPL', %s, 'USA', "
+                            "'Meet 0');").format(sql.Identifier(powerlifting_table)),
+                    (date(date.today().year, 1, 15),))
+        conn.commit()
+    postgres_instance.build_clean_view(powerlifting_table)
+
+    assert 'No Class' not in set(postgres_instance.fetch_data(powerlifting_table)['Name'])
+    # The pandas rules refuse such rows outright
+    with pytest.raises(ValueError, match='AgeClass'):
+        postgres_instance.fetch_data(powerlifting_table, use_clean_view=False)
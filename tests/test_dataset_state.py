@@ -0,0 +1,27 @@
+from conftest import synthetic_powerlifting_rows
+
+
+def test_archive_marker_lives_in_the_database(postgres_instance, powerlifting_table):
+    assert not postgres_instance.archive_already_loaded(powerlifting_table, 'first-archive')
+
+    postgres_instance.mark_archive_loaded(powerlifting_table, 'first-archive')
+    assert postgres_instance.archive_already_loaded(powerlifting_table, 'first-archive')
+    assert not postgres_instance.archive_already_loaded(powerlifting_table, 'second-archive')
+    # Another table, e.g. in a fresh or restored database, has no record of the archive
+    assert not postgres_instance.archive_already_loaded(f"{powerlifting_table}_elsewhere", 'first-archive')
+    assert not postgres_instance.archive_already_loaded(powerlifting_table, None)
+
+
+def test_load_records_its_archive(postgres_instance, powerlifting_table):
+    version = postgres_instance.get_dataset_version(powerlifting_table)
+    postgres_instance.insert_data(synthetic_powerlifting_rows(rows=10, seed=2), powerlifting_table,
+                                  archive_sha256='second-archive')
+
+    assert postgres_instance.archive_already_loaded(powerlifting_table, 'second-archive')
+    assert postgres_instance.get_dataset_version(powerlifting_table) != version
+
+    # Marking an archive without new rows leaves the snapshot version alone
+    version = postgres_instance.get_dataset_version(powerlifting_table)
+    postgres_instance.mark_archive_loaded(powerlifting_table, 'third-archive')
+    assert postgres_instance.archive_already_loaded(powerlifting_table, 'third-archive')
+    assert postgres_instance.get_dataset_version(powerlifting_table) == version
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from conftest import synthetic_powerlifting_rows
+from data_cleaning import downcast_column, downcast_tolerance, reduce_mem_usage
+
+
+def test_all_missing_float_column_stays_float():
+    values = pd.Series([np.nan] * 5, name='Dots')
+    downcast = downcast_column(values, downcast_tolerance('Dots'))
+
+    assert pd.api.types.is_float_dtype(downcast)
+    assert downcast.isna().all()
+
+
+def test_whole_numbers_become_nullable_integers():
+    downcast = downcast_column(pd.Series([1.0, 2.0, np.nan, 120.0], name='Place'))
+
+    assert downcast.dtype == pd.Int8Dtype()
+    assert downcast.isna().sum() == 1
+
+
+def test_reduce_mem_usage_keeps_values_within_tolerance():
+    rows = synthetic_powerlifting_rows()
+    rows['Dots'] = np.nan
+    downcast = reduce_mem_usage(rows.copy(), verbose=False)
+
+    assert pd.api.types.is_float_dtype(downcast['Dots'])
+    assert downcast.memory_usage(deep=True).sum() < rows.memory_usage(deep=True).sum()
+    for col in rows.columns:
+        if pd.api.types.is_float_dtype(rows[col]):
+            error = (downcast[col].astype(np.float64) - rows[col]).abs().max()
+            assert not error > downcast_tolerance(col), col
+        else:
+            assert (downcast[col].astype(object).where(downcast[col].notna(), None).tolist()
+                    == rows[col].astype(object).where(rows[col].notna(), None).tolist()), col
+
+
+def test_verbose_report_compares_recorded_sizes(capsys):
+    rows = synthetic_powerlifting_rows()
+    bytes_before = rows.memory_usage(deep=True, index=False)
+    downcast = reduce_mem_usage(rows, verbose=True)
+
+    report = capsys.readouterr().out
+    start_mem, end_mem = bytes_before.sum() / 1024**2, downcast.memory_usage(deep=True, index=False).sum() / 1024**2
+    assert 'Mem. usage decreased from {:5.2f} Mb to {:5.2f} Mb'.format(start_mem, end_mem) in report
+    assert 'float64' in report and 'float32' in report
+
+
+def test_declared_text_columns_keep_their_type():
+    rows = pd.DataFrame({'WeightClassKg': pd.Series(['83', '93', '120'] * 4, dtype=object),
+                         'Place': pd.Series(['1', '2', '3'] * 4, dtype=object),
+                         'Sex': pd.Series(['M', 'F', 'M'] * 4, dtype=object),
+                         'LifterId': pd.Series(['7', '8', '9'] * 4, dtype=object)})
+    downcast = reduce_mem_usage(rows.copy(), verbose=False)
+
+    for col in ('WeightClassKg', 'Place', 'Sex'):
+        assert downcast[col].dtype == object, col
+        assert downcast[col].tolist() == rows[col].tolist(), col
+    # A column the extract doesn't declare still has its type inferred
+    assert downcast['LifterId'].dtype == pd.Int8Dtype()
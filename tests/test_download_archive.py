@@ -0,0 +1,110 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from data_retrieval import PowerliftingDataRetriever
+
+OLD_ARCHIVE = bytes(range(256)) * 4096
+NEW_ARCHIVE = bytes(reversed(range(256))) * 4096
+
+
+class ArchiveHandler(BaseHTTPRequestHandler):
+    '''Serve the current archive with a strong ETag, honouring Range and If-Range like a static file host'''
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        body, etag = server.archive, server.etag
+        range_header = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        if range_header and (if_range is None or if_range == etag):
+            start = int(range_header.split('=')[1].split('-')[0]) + server.range_skew
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(body)}')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(body) - 1}/{len(body)}')
+            body = body[start:]
+        else:
+            self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def archive_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ArchiveHandler)
+    server.archive, server.etag, server.range_skew, server.requests = OLD_ARCHIVE, '"old"', 0, []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def retriever(tmp_path, archive_server):
+    retriever = PowerliftingDataRetriever(spool_dir=str(tmp_path))
+    retriever.zip_url = f"http://127.0.0.1:{archive_server.server_port}/openpowerlifting-latest.zip"
+    return retriever
+
+
+def leave_partial_download(retriever, content, etag, size):
+    '''Simulate an earlier run that was interrupted after size bytes'''
+    with open(retriever.archive_path + '.part', 'wb') as part_file:
+        part_file.write(content[:size])
+    retriever.remember_partial(retriever.zip_url, {'ETag': etag})
+
+
+def read_archive(path):
+    with open(path, 'rb') as archive:
+        return archive.read()
+
+
+def test_resumes_unchanged_archive_from_partial_file(retriever, archive_server):
+    leave_partial_download(retriever, OLD_ARCHIVE, '"old"', 300000)
+
+    path = retriever.download_archive(block_size=65536)
+
+    assert read_archive(path) == OLD_ARCHIVE
+    assert archive_server.requests[-1]['Range'] == 'bytes=300000-'
+    assert archive_server.requests[-1]['If-Range'] == '"old"'
+    assert 'partial' not in retriever.fetch_cache[retriever.zip_url]
+
+
+def test_restarts_when_upstream_changed_since_partial_file(retriever, archive_server):
+    leave_partial_download(retriever, OLD_ARCHIVE, '"old"', 300000)
+    archive_server.archive, archive_server.etag = NEW_ARCHIVE, '"new"'
+
+    path = retriever.download_archive(block_size=65536)
+
+    assert read_archive(path) == NEW_ARCHIVE
+    assert retriever.fetch_cache[retriever.zip_url]['etag'] == '"new"'
+
+
+def test_restarts_when_resumed_range_starts_elsewhere(retriever, archive_server):
+    leave_partial_download(retriever, OLD_ARCHIVE, '"old"', 300000)
+    archive_server.range_skew = 4096
+
+    path = retriever.download_archive(block_size=65536, backoff=0)
+
+    assert read_archive(path) == OLD_ARCHIVE
+    assert 'Range' not in archive_server.requests[-1]
+
+
+def test_discards_partial_file_without_validator(retriever, archive_server):
+    with open(retriever.archive_path + '.part', 'wb') as part_file:
+        part_file.write(NEW_ARCHIVE[:300000])
+
+    path = retriever.download_archive(block_size=65536)
+
+    assert read_archive(path) == OLD_ARCHIVE
+    assert len(archive_server.requests) == 1 and 'Range' not in archive_server.requests[0]
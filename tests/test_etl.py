@@ -0,0 +1,78 @@
+import builtins
+import importlib
+import sys
+import types
+
+import pytest
+
+from conftest import synthetic_powerlifting_rows
+
+
+class Recorder:
+    '''Stands in for the ETL's handler or retriever: records every call and answers from returns'''
+
+    def __init__(self, calls, returns):
+        self.calls = calls
+        self.returns = returns
+        self.archive_sha256 = 'archive-hash'
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self.returns.get(name)
+        return method
+
+
+@pytest.fixture
+def run_etl(monkeypatch):
+    '''Runs etl_openpl_postgres against fakes and returns the calls it made, in order'''
+    monkeypatch.setitem(sys.modules, 'config', types.SimpleNamespace(DATABASE_URL='postgresql://unused'))
+    monkeypatch.setenv('DATABASE_URL', 'postgresql://unused')
+    monkeypatch.setattr(builtins, 'input', lambda prompt='': 'y')
+    sys.modules.pop('pg_data_etl', None)
+    pg_data_etl = importlib.import_module('pg_data_etl')
+    monkeypatch.setattr(pg_data_etl.time, 'sleep', lambda seconds: None)
+
+    def run(max_date, record_count, pipelined=False):
+        calls = []
+        returns = {'download_archive': '/tmp/openpowerlifting-latest.zip', 'archive_already_loaded': False,
+                   'retrieve_last_updated_date': '2024-05-01', 'collect_max_dt': max_date,
+                   'collect_cnt_records': record_count, 'process_subset_from_csv': synthetic_powerlifting_rows(10),
+                   'load_pipelined': 10}
+        monkeypatch.setattr(pg_data_etl, 'PowerliftingDataHandler', lambda url: Recorder(calls, returns))
+        monkeypatch.setattr(pg_data_etl, 'PowerliftingDataRetriever', lambda: Recorder(calls, returns))
+        pg_data_etl.etl_openpl_postgres('postgresql://unused', pipelined=pipelined, lookback_days=30)
+        return calls
+
+    yield run
+    sys.modules.pop('pg_data_etl', None)
+
+
+def call(calls, name):
+    matches = [(args, kwargs) for called, args, kwargs in calls if called == name]
+    assert len(matches) == 1, (name, matches)
+    return matches[0]
+
+
+def called(calls):
+    return [name for name, _, _ in calls]
+
+
+@pytest.mark.parametrize('pipelined', [False, True])
+def test_empty_table_gets_full_load(run_etl, pipelined):
+    calls = run_etl(max_date=None, record_count=0, pipelined=pipelined)
+
+    extract = 'stream_subset_from_csv' if pipelined else 'process_subset_from_csv'
+    load = 'load_pipelined' if pipelined else 'insert_data'
+    assert call(calls, extract)[1] == {'filter_date': None}
+    assert call(calls, load)[1]['upsert'] is False
+    names = called(calls)
+    assert names.index('drop_indexes') < names.index(load) < names.index('create_indexes')
+
+
+def test_loaded_table_gets_lookback_upsert(run_etl):
+    calls = run_etl(max_date='2024-04-30', record_count=1000)
+
+    assert str(call(calls, 'process_subset_from_csv')[1]['filter_date'].date()) == '2024-03-31'
+    assert call(calls, 'insert_data')[1]['upsert'] is True
+    assert 'drop_indexes' not in called(calls)
@@ -0,0 +1,26 @@
+import pytest
+
+from postgres_ingestion import APP_QUERY_SHAPES
+
+# The planned index each of the app's query shapes should use
+EXPECTED_INDEXES = {
+    'cohort': 'cohort',
+    'lifter': 'lifter',
+    'federation_state': 'federation_state',
+    'max_date': 'date',
+}
+
+
+def test_every_query_shape_has_an_expected_index():
+    assert set(EXPECTED_INDEXES) == set(APP_QUERY_SHAPES)
+
+
+@pytest.mark.parametrize('powerlifting_table', [False, True], ids=['plain', 'partitioned'], indirect=True)
+def test_app_queries_use_planned_indexes(postgres_instance, powerlifting_table):
+    index_names = postgres_instance.create_indexes(powerlifting_table)
+    index_usage = postgres_instance.check_index_usage(powerlifting_table)
+
+    for shape, suffix in EXPECTED_INDEXES.items():
+        expected = f"{powerlifting_table}_{suffix}_idx"
+        assert expected in index_names
+        assert expected in index_usage[shape], f"'{shape}' doesn't use {expected}: {index_usage[shape]}"
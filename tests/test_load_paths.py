@@ -0,0 +1,115 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+from psycopg2 import sql
+
+from conftest import synthetic_powerlifting_rows
+from postgres_ingestion import NATURAL_KEY
+
+TABLE_NAME = 'test_load_paths'
+
+# insert_data's COPY modes and load_pipelined, which share prepare_load and finish_load
+LOADERS = {
+    'csv': lambda handler, chunks, **options: handler.insert_data(chunks, TABLE_NAME, **options),
+    'csv_unquarantined': lambda handler, chunks, **options: handler.insert_data(chunks, TABLE_NAME, quarantine=False,
+                                                                                **options),
+    'binary': lambda handler, chunks, **options: handler.insert_data(chunks, TABLE_NAME, copy_format='binary',
+                                                                     **options),
+    'pipelined': lambda handler, chunks, **options: handler.load_pipelined(chunks, TABLE_NAME, **options),
+}
+
+
+@pytest.fixture
+def load_table(postgres_instance):
+    '''Drops the scratch table, its rejects table and its load records before and after the test'''
+
+    def drop_table():
+        with postgres_instance.connection() as conn, conn.cursor() as cur:
+            cur.execute(sql.SQL("DROP TABLE IF EXISTS {}, {}, {} CASCADE;").format(
+                sql.Identifier(TABLE_NAME), sql.Identifier(f"{TABLE_NAME}_rejects"),
+                sql.Identifier(f"{TABLE_NAME}_staging")))
+            for metadata_table in ('etl_runs', 'dataset_state'):
+                cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (metadata_table,))
+                if cur.fetchone()[0]:
+                    cur.execute(sql.SQL('DELETE FROM {} WHERE "TableName" = %s;').format(
+                        sql.Identifier(metadata_table)), (TABLE_NAME,))
+            conn.commit()
+
+    drop_table()
+    yield TABLE_NAME
+    drop_table()
+
+
+def table_state(postgres_instance):
+    with postgres_instance.connection() as conn, conn.cursor() as cur:
+        cur.execute(sql.SQL('SELECT count(*), sum("Wilks"::numeric) FROM {};').format(sql.Identifier(TABLE_NAME)))
+        row_count, wilks = cur.fetchone()
+        cur.execute('SELECT "RowsLoaded", "RowsUpdated", "RowCount" FROM etl_runs WHERE "TableName" = %s '
+                    'ORDER BY "RunId" DESC LIMIT 1;', (TABLE_NAME,))
+        last_run = cur.fetchone()
+        cur.execute('SELECT "RowCount" FROM dataset_state WHERE "TableName" = %s;', (TABLE_NAME,))
+        return row_count, float(round(wilks, 2)), last_run, cur.fetchone()[0]
+
+
+@pytest.mark.parametrize('loader', LOADERS)
+def test_load_paths_load_and_upsert_alike(postgres_instance, load_table, loader):
+    rows = synthetic_powerlifting_rows(rows=600, seed=3).drop_duplicates(subset=NATURAL_KEY).reset_index(drop=True)
+    postgres_instance.create_table(rows, load_table)
+
+    LOADERS[loader](postgres_instance, iter([rows.iloc[:0], rows.iloc[:200], rows.iloc[200:400], rows.iloc[400:]]))
+    row_count = len(rows)
+    assert table_state(postgres_instance) == (row_count, round(rows['Wilks'].sum(), 2), (row_count, 0, row_count),
+                                              row_count)
+
+    # An upsert updates the rows already loaded and inserts the new ones
+    changed = rows.iloc[-100:].assign(Wilks=rows['Wilks'].iloc[-100:] + 1)
+    new_rows = synthetic_powerlifting_rows(rows=50, seed=4).assign(Name=[f"New lifter {i}" for i in range(50)])
+    LOADERS[loader](postgres_instance, iter([changed, new_rows]), upsert=True)
+    wilks = round(rows['Wilks'].sum() + len(changed) + new_rows['Wilks'].sum(), 2)
+    assert table_state(postgres_instance) == (row_count + 50, wilks, (50, 100, row_count + 50), row_count + 50)
+
+
+def partition_row_counts(postgres_instance):
+    with postgres_instance.connection() as conn, conn.cursor() as cur:
+        counts = {}
+        for partition_name in postgres_instance.get_partitions(cur, TABLE_NAME):
+            cur.execute(sql.SQL("SELECT count(*) FROM {};").format(sql.Identifier(partition_name)))
+            counts[partition_name[len(TABLE_NAME) + 1:]] = cur.fetchone()[0]
+        return counts
+
+
+@pytest.mark.parametrize('loader', LOADERS)
+def test_later_chunks_with_older_years_get_partitions(postgres_instance, load_table, loader):
+    rows = synthetic_powerlifting_rows(rows=600, seed=3).drop_duplicates(subset=NATURAL_KEY)
+    recent = rows[rows['Date'].dt.year >= 2018]
+    older = rows[rows['Date'].dt.year < 2018]
+    postgres_instance.create_table(recent.iloc[:0], load_table, partition_by_year=True)
+
+    LOADERS[loader](postgres_instance, iter([recent.iloc[:0], recent, older.iloc[:100], older.iloc[100:]]))
+    counts = partition_row_counts(postgres_instance)
+    assert counts.pop('default') == 0
+    assert counts == {str(year): int(count) for year, count in rows['Date'].dt.year.value_counts().items()}
+
+    # A later load can still add a year older than any loaded so far
+    oldest = synthetic_powerlifting_rows(rows=20, seed=5).assign(Date=pd.Timestamp('2005-06-15'),
+                                                                 Name=[f"Old lifter {i}" for i in range(20)])
+    LOADERS[loader](postgres_instance, iter([recent.iloc[:1].assign(Name='Recent lifter'), oldest]))
+    counts = partition_row_counts(postgres_instance)
+    assert (counts['default'], counts['2005']) == (0, 20)
+
+
+@pytest.mark.parametrize('powerlifting_table', [True], indirect=True)
+def test_retention_drops_expired_partitions(postgres_instance, powerlifting_table):
+    postgres_instance.create_indexes(powerlifting_table)
+    with postgres_instance.connection() as conn, conn.cursor() as cur:
+        cur.execute(sql.SQL('SELECT count(*) FROM {} WHERE "Date" >= %s;').format(sql.Identifier(powerlifting_table)),
+                    (date(date.today().year - 4, 1, 1),))
+        kept_rows = cur.fetchone()[0]
+
+    dropped = postgres_instance.drop_expired_partitions(powerlifting_table, keep_years=5)
+    assert dropped == [f"{powerlifting_table}_{year}" for year in range(2010, date.today().year - 4)]
+    with postgres_instance.connection() as conn, conn.cursor() as cur:
+        cur.execute(sql.SQL("SELECT count(*) FROM {};").format(sql.Identifier(powerlifting_table)))
+        assert cur.fetchone()[0] == kept_rows
+        assert postgres_instance.get_dataset_state(cur, powerlifting_table)[1] == kept_rows
@@ -0,0 +1,44 @@
+import functools
+
+import pandas as pd
+import pytest
+
+from benchmark_prefilter import write_synthetic_archive
+from data_retrieval import PowerliftingDataRetriever
+
+
+@pytest.fixture(scope='module')
+def archive_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('spool') / 'openpowerlifting-latest.zip')
+    write_synthetic_archive(path, 20000)
+    return path
+
+
+def make_retriever(archive_path, tmp_path):
+    '''A retriever over the synthetic archive whose parallel parse splits it into many small blocks'''
+    retriever = PowerliftingDataRetriever(spool_dir=str(tmp_path))
+    retriever.download_archive = lambda: archive_path
+    retriever.parse_in_parallel = functools.partial(PowerliftingDataRetriever.parse_in_parallel, retriever,
+                                                    block_size=64 * 1024)
+    return retriever
+
+
+@pytest.mark.parametrize('clean', [False, True])
+@pytest.mark.parametrize('prefilter', [False, True])
+def test_parallel_full_extract_matches_serial(archive_path, tmp_path, clean, prefilter):
+    retriever = make_retriever(archive_path, tmp_path)
+    serial = retriever.retrieve_and_process_csv(clean=clean, prefilter=prefilter)
+    parallel = retriever.retrieve_and_process_csv(workers=2, clean=clean, prefilter=prefilter)
+
+    assert len(serial) > 0
+    pd.testing.assert_frame_equal(parallel, serial)
+
+
+@pytest.mark.parametrize('clean', [False, True])
+def test_parallel_subset_extract_matches_serial(archive_path, tmp_path, clean):
+    retriever = make_retriever(archive_path, tmp_path)
+    serial = retriever.process_subset_from_csv('2015-01-01', clean=clean)
+    parallel = retriever.process_subset_from_csv('2015-01-01', workers=2, clean=clean)
+
+    assert 0 < len(serial) < len(retriever.retrieve_and_process_csv())
+    pd.testing.assert_frame_equal(parallel, serial)
@@ -0,0 +1,99 @@
+import csv
+import io
+import math
+
+import pandas as pd
+import psycopg2
+import pytest
+
+from postgres_ingestion import BinaryCopyReader, DataFrameCsvReader, PowerliftingDataHandler
+
+
+class FakeCopyCursor:
+    '''
+    Stands in for a psycopg2 cursor: COPY fails with a DataError when its rows include one of bad_names, and the
+    copy_batch savepoint keeps or discards the rows of each COPY like PostgreSQL would.
+    '''
+
+    def __init__(self, bad_names=()):
+        self.bad_names = set(bad_names)
+        self.table = []
+        self.pending = []
+        self.rejects = []
+        self.copies = 0
+
+    def execute(self, query, params=None):
+        if query == 'SAVEPOINT copy_batch;':
+            self.pending = []
+        elif query == 'RELEASE SAVEPOINT copy_batch;':
+            self.table.extend(self.pending)
+            self.pending = []
+        elif query == 'ROLLBACK TO SAVEPOINT copy_batch;':
+            self.pending = []
+        else:
+            # record_rejects' INSERT into the rejects table
+            self.rejects.append(params)
+
+    def copy_expert(self, query, reader):
+        self.copies += 1
+        data = reader.read()
+        names = [row[0] for row in csv.reader(io.StringIO(data))] if isinstance(data, str) else []
+        bad = [name for name in names if name in self.bad_names]
+        if bad:
+            raise psycopg2.DataError(f'invalid input syntax for type real: "{bad[0]}"')
+        self.pending.extend(names)
+
+
+def quarantine(cur, batch, make_reader=None, max_rejects=1000):
+    handler = PowerliftingDataHandler('postgresql://unused')
+    make_reader = make_reader or (lambda frames: DataFrameCsvReader(frames))
+    return handler.copy_with_quarantine(cur, 'COPY', make_reader, batch, 'powerlifting_data',
+                                        'powerlifting_data_rejects', max_rejects)
+
+
+def lifters(rows):
+    return pd.DataFrame({'Name': [f"Lifter {i}" for i in range(rows)], 'BodyweightKg': [80.5] * rows})
+
+
+def test_clean_batch_is_copied_once():
+    cur = FakeCopyCursor()
+    assert quarantine(cur, lifters(100)) == 0
+    assert cur.copies == 1
+    assert cur.table == list(lifters(100)['Name'])
+    assert cur.rejects == []
+
+
+def test_bad_rows_are_isolated_in_source_order():
+    batch = lifters(1000)
+    bad_positions = [3, 500, 501, 999]
+    cur = FakeCopyCursor(batch['Name'].iloc[bad_positions])
+
+    assert quarantine(cur, batch) == len(bad_positions)
+    assert cur.table == list(batch['Name'].drop(index=bad_positions))
+    assert [row_data.split(',')[0] for _, _, row_data in cur.rejects] == list(batch['Name'].iloc[bad_positions])
+    assert all(error.startswith('invalid input syntax') for _, error, _ in cur.rejects)
+    # k bad rows cost O(k log n) COPYs, not one per row
+    assert cur.copies <= 1 + 2 * len(bad_positions) * math.ceil(math.log2(len(batch)))
+
+
+def test_load_aborts_past_max_rejects():
+    batch = lifters(100)
+    cur = FakeCopyCursor(batch['Name'].iloc[[10, 20, 30]])
+
+    with pytest.raises(ValueError, match='More than the allowed number of malformed rows'):
+        quarantine(cur, batch, max_rejects=2)
+    assert len(cur.rejects) == 2
+
+
+def test_binary_encoding_errors_are_isolated():
+    batch = pd.DataFrame({'Name': ['Jane Doe', 'John Doe', 'Jim Doe'],
+                          'BodyweightKg': pd.Series(['60.5', 'heavy', '90'], dtype=object)})
+    table_columns = [('Name', 'character varying'), ('BodyweightKg', 'real')]
+    cur = FakeCopyCursor()
+
+    rejected = quarantine(cur, batch, lambda frames: BinaryCopyReader(frames, table_columns, eager=True))
+    assert rejected == 1
+    assert [(row_data, error) for _, error, row_data in cur.rejects] == [
+        ('John Doe,heavy', "column BodyweightKg: invalid input for type real: 'heavy'")]
+    # Batches are encoded before their COPY starts, so only the two clean halves reach the server
+    assert cur.copies == 2